@@ -1,11 +1,12 @@
 """
 crypto_scraper.py
 ─────────────────
-Scrapes CoinGecko's full coin‑market table (all pages) using Playwright,
-exports the data to a styled Excel file, and emails it to you.
+Scrapes CoinGecko's full coin‑market table (all pages) – straight from the
+public JSON API by default, or by rendering the site with Playwright when
+USE_API is False – exports the data to a styled Excel file, and emails it to you.
 
 SETUP (one‑time)
-    1.  pip install playwright openpyxl python-dotenv
+    1.  pip install playwright python-dotenv "httpx[http2]"
     2.  playwright install chromium
     3.  cp .env.example .env          # fill in your SMTP credentials
     4.  python crypto_scraper.py
@@ -19,19 +20,19 @@ Gmail users:
 from __future__ import annotations
 
 import asyncio
+import pickle
 import re
 import smtplib
 import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from email.mime.application import MIMEApplication
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from email.message import EmailMessage
 from pathlib import Path
 
+import httpx
 from dotenv import load_dotenv
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from playwright.async_api import async_playwright
 
 # ──────────────────────────────────────────────
@@ -40,6 +41,14 @@ from playwright.async_api import async_playwright
 load_dotenv()                                   # reads .env in the same folder
 
 BASE_URL   = "https://www.coingecko.com/en/coins"   # starting page
+API_URL    = "https://api.coingecko.com/api/v3"     # public JSON API
+USE_API    = True       # False → fall back to rendering the site with Playwright
+API_PER_PAGE    = 250   # max rows the /coins/markets endpoint returns per page
+API_CONCURRENCY = 5     # simultaneous API requests (public API is rate limited)
+API_RETRY_SECONDS = 300 # how long one page keeps retrying 429s / server errors
+SCRAPE_CONCURRENCY = 5  # warm browser tabs in the pool when USE_API is False
+TABLE_FULL_ROWS    = 50 # rows on a full CoinGecko listing page (at least)
+SITE_PER_PAGE      = 100 # coins per page on the CoinGecko website listing
 OUTPUT_DIR = Path(__file__).resolve().parent
 TIMESTAMP  = datetime.now().strftime("%Y%m%d_%H%M%S")
 PAGES_DIR  = OUTPUT_DIR / "output"  # folder for individual pages and combined file
@@ -50,6 +59,11 @@ PAGES_DIR.mkdir(exist_ok=True)
 # Combined Excel file will also be saved in the output folder
 XLSX_PATH  = PAGES_DIR / f"coingecko_all_data_{TIMESTAMP}.xlsx"
 
+# Each scraped page is appended here as a pickle record, so a crash
+# mid‑scrape doesn't lose them. Removed once the Excel file is written.
+CHECKPOINT_PATH = PAGES_DIR / "scrape_checkpoint.pkl"
+CHECKPOINT_MAX_AGE = 3600   # seconds – older checkpointed pages are too stale to reuse
+
 HEADERS = [
     "Coin Name",
     "Price (USD)",
@@ -61,6 +75,10 @@ HEADERS = [
     "Coin Link",
 ]
 
+# One sheet row: text for name/link, numbers (or None when missing) for the
+# price, % change, volume and market‑cap columns
+Row = list[str | float | None]
+
 # ──────────────────────────────────────────────
 # FILE CLEANUP
 # ──────────────────────────────────────────────
@@ -73,8 +91,13 @@ def delete_old_excel_files() -> None:
     if not PAGES_DIR.exists():
         return
     
-    # Find all Excel files in the output directory
-    excel_files = list(PAGES_DIR.glob("*.xlsx"))
+    # Find all Excel files in the output directory, skipping temporary
+    # Excel lock files (start with ~$) – one scandir pass, no Path objects
+    with os.scandir(PAGES_DIR) as it:
+        excel_files = [
+            entry for entry in it
+            if entry.name.endswith(".xlsx") and not entry.name.startswith("~$")
+        ]
     
     if not excel_files:
         print("  🗑️  No old Excel files to delete.\n")
@@ -85,20 +108,16 @@ def delete_old_excel_files() -> None:
     
     print(f"  🗑️  Found {len(excel_files)} old Excel file(s) to delete...")
     
-    for file_path in excel_files:
+    for entry in excel_files:
         try:
-            # Skip temporary Excel files (start with ~$)
-            if file_path.name.startswith("~$"):
-                continue
-            
-            file_path.unlink()  # Delete the file
-            print(f"     ✓ Deleted: {file_path.name}")
+            os.unlink(entry.path)  # Delete the file
+            print(f"     ✓ Deleted: {entry.name}")
             deleted_count += 1
         except PermissionError:
-            print(f"     ✗ Cannot delete (file is open): {file_path.name}")
+            print(f"     ✗ Cannot delete (file is open): {entry.name}")
             failed_count += 1
         except Exception as e:
-            print(f"     ✗ Error deleting {file_path.name}: {e}")
+            print(f"     ✗ Error deleting {entry.name}: {e}")
             failed_count += 1
     
     if deleted_count > 0:
@@ -108,75 +127,355 @@ def delete_old_excel_files() -> None:
 
 
 # ──────────────────────────────────────────────
-# SCRAPER
+# BACKGROUND FILE WRITES
+# ──────────────────────────────────────────────
+
+# One thread for every file write made during the scrape (Excel rows and
+# checkpoints). Writes stay off the event loop, so the next page keeps
+# loading, but still run one at a time – no locking needed in ExcelSink.
+_DISK_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-writer")
+
+
+async def write_in_background(func, *args) -> None:
+    """Run a blocking file write on the disk‑writer thread and await it."""
+    await asyncio.get_running_loop().run_in_executor(_DISK_WRITER, func, *args)
+
+
+# ──────────────────────────────────────────────
+# CHECKPOINT
+# ──────────────────────────────────────────────
+
+def save_checkpoint(page_num: int, rows: list[Row]) -> None:
+    """
+    Append one finished page to CHECKPOINT_PATH as its own pickle record,
+    stamped with the time it was scraped.
+    Only the new page is written – pages already checkpointed are never
+    re‑serialised – so checkpointing the whole scrape costs O(rows).
+    """
+    with open(CHECKPOINT_PATH, "ab") as f:
+        pickle.dump((time.time(), page_num, rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint() -> dict[int, list[Row]]:
+    """
+    Read back the pages saved by save_checkpoint ({page number: rows}).
+    Pages scraped more than CHECKPOINT_MAX_AGE ago are skipped – prices
+    have moved on. A record cut short by a crash mid‑write is cut off the
+    file, so pages appended after it can be read back next time.
+    """
+    results: dict[int, list[Row]] = {}
+    try:
+        f = open(CHECKPOINT_PATH, "r+b")
+    except FileNotFoundError:
+        return results
+    oldest = time.time() - CHECKPOINT_MAX_AGE
+    with f:
+        while True:
+            good_end = f.tell()
+            try:
+                saved_at, page_num, rows = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError, ValueError, TypeError):
+                # End of file, or a half‑written record – drop whatever follows
+                f.truncate(good_end)
+                break
+            if saved_at >= oldest:
+                results[page_num] = rows
+    return results
+
+
+# ──────────────────────────────────────────────
+# API SCRAPER
+# ──────────────────────────────────────────────
+
+def _pct(value: float | None) -> float | None:
+    """API percentages are in percent (1.5 = 1.5 %); Excel wants the fraction."""
+    return None if value is None else value / 100
+
+
+def api_row(coin: dict) -> Row:
+    """Map one /coins/markets JSON object onto the 8 HEADERS columns."""
+    return [
+        f"{coin['name']} {coin['symbol'].upper()}",
+        coin.get("current_price"),
+        _pct(coin.get("price_change_percentage_1h_in_currency")),
+        _pct(coin.get("price_change_percentage_24h_in_currency")),
+        _pct(coin.get("price_change_percentage_7d_in_currency")),
+        coin.get("total_volume"),
+        coin.get("market_cap"),
+        f"{BASE_URL}/{coin['id']}",
+    ]
+
+
+async def api_get_json(client: httpx.AsyncClient, path: str, label: str,
+                       params: dict | None = None):
+    """
+    GET one API endpoint and return its decoded JSON body.
+    Rate limits (429), server errors and network errors are retried until
+    API_RETRY_SECONDS have passed since the first attempt. Returns None if
+    the request never succeeded or the body wasn't valid JSON.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + API_RETRY_SECONDS
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            resp = await client.get(f"{API_URL}{path}", params=params)
+        except httpx.HTTPError as e:
+            problem, wait = f"request error: {e}", 2 * attempt
+        else:
+            if resp.status_code == 200:
+                try:
+                    return resp.json()
+                except ValueError:
+                    print(f"    ✗  {label}: response was not valid JSON")
+                    return None
+
+            if resp.status_code == 429:
+                try:
+                    wait = float(resp.headers.get("retry-after", 10 * attempt))
+                except ValueError:                      # HTTP‑date form
+                    wait = 10 * attempt
+                problem = "rate limited"
+            elif resp.status_code >= 500:
+                problem, wait = f"HTTP {resp.status_code}", 2 * attempt
+            else:
+                print(f"    ✗  {label}: HTTP {resp.status_code}")
+                return None
+
+        # Only wait if there's time left for another attempt afterwards
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            print(f"    ✗  {label}: {problem} – giving up after {API_RETRY_SECONDS}s")
+            return None
+        wait = min(wait, remaining)
+        print(f"    ⏳ {label}: {problem}, retrying in {wait:.0f}s...")
+        await asyncio.sleep(wait)
+
+
+async def fetch_total_coins(client: httpx.AsyncClient) -> int | None:
+    """
+    Ask the API how many coins are currently listed (one small request).
+    None if the API couldn't be reached or answered with something unexpected.
+    """
+    body = await api_get_json(client, "/global", "Coin count")
+    if body is None:
+        return None
+    try:
+        return int(body["data"]["active_cryptocurrencies"])
+    except (TypeError, KeyError, ValueError) as e:
+        print(f"    ✗  Coin count: unexpected response ({e!r})")
+        return None
+
+
+async def fetch_site_page_count() -> int | None:
+    """
+    Work out how many website listing pages there are from the API coin
+    count, so Playwright never has to discover it. None if the API is down.
+    """
+    async with httpx.AsyncClient(http2=True, timeout=30) as client:
+        total = await fetch_total_coins(client)
+    if total is None:
+        print("    ⚠️  Could not get the coin count from the API")
+        return None
+    return max(1, -(-total // SITE_PER_PAGE))          # ceil division
+
+
+class IncompleteScrapeError(RuntimeError):
+    """Some pages could not be fetched, so the coin list would have gaps."""
+
+    def __init__(self, missing: list[int], total: int) -> None:
+        self.missing = missing
+        super().__init__(
+            f"{len(missing)} of {total} pages could not be fetched: "
+            f"{', '.join(map(str, missing))}"
+        )
+
+
+async def fetch_api_page(client: httpx.AsyncClient, sem: asyncio.Semaphore,
+                         page_num: int) -> list[Row] | None:
+    """
+    Fetch one page of /coins/markets and map it to rows.
+    Returns None if the page could not be fetched or wasn't a list of coins.
+    """
+    params = {
+        "vs_currency": "usd",
+        "order": "market_cap_desc",
+        "per_page": API_PER_PAGE,
+        "page": page_num,
+        "price_change_percentage": "1h,24h,7d",
+    }
+    # The retry budget starts at the first attempt, not while queued on the semaphore
+    async with sem:
+        coins = await api_get_json(client, "/coins/markets", f"Page {page_num}", params)
+    if coins is None:
+        return None
+
+    try:
+        rows = [api_row(coin) for coin in coins]
+    except (TypeError, KeyError, AttributeError) as e:
+        print(f"    ✗  Page {page_num}: unexpected response ({e!r})")
+        return None
+    print(f"  ► Page {page_num}: {len(rows)} coins")
+    return rows
+
+
+async def scrape_all_api(sink: ExcelSink) -> list[Row]:
+    """
+    Collect every coin from the CoinGecko JSON API – no browser involved.
+    Pages are fetched concurrently and handed to the Excel sink as they land.
+    Raises IncompleteScrapeError if any page could not be fetched.
+    """
+    async with httpx.AsyncClient(http2=True, timeout=30) as client:
+        total = await fetch_total_coins(client)
+        if total is None:
+            print("  ✗  Could not get the coin count from the API")
+            return []
+        num_pages = -(-total // API_PER_PAGE)          # ceil division
+        print(f"  🌐 {total} coins listed → {num_pages} API pages of {API_PER_PAGE}")
+
+        sem = asyncio.Semaphore(API_CONCURRENCY)
+        missing: list[int] = []
+
+        async def fetch_and_store(page_num: int) -> list[Row]:
+            rows = await fetch_api_page(client, sem, page_num)
+            if rows is None:
+                missing.append(page_num)
+                rows = []
+            await write_in_background(sink.append_page, page_num, rows)
+            return rows
+
+        pages = await asyncio.gather(
+            *(fetch_and_store(p) for p in range(1, num_pages + 1))
+        )
+
+    if missing:
+        raise IncompleteScrapeError(sorted(missing), num_pages)
+    return [row for page_rows in pages for row in page_rows]
+
+
+# ──────────────────────────────────────────────
+# PLAYWRIGHT SCRAPER (fallback when USE_API is False)
 # ──────────────────────────────────────────────
 
-async def scrape_page(page) -> list[list[str]]:
+# "$1,234.56", "-$0.5", "$4.2B" – optional sign, $, number, magnitude suffix
+_MONEY_RE = re.compile(r"(?P<sign>[-−])?\s*\$?\s*(?P<num>\d[\d,]*(?:\.\d+)?)\s*(?P<mag>[KMBT])?\b", re.IGNORECASE)
+# "1.2%", "-0.35 %"
+_PCT_RE = re.compile(r"(?P<sign>[-−])?\s*(?P<num>\d[\d,]*(?:\.\d+)?)\s*%")
+# Tiny prices are shown with a subscript zero count: "$0.0₅1234" = 0.000001234
+_SUBSCRIPT_ZEROS_RE = re.compile(r"0\.0([₀-₉]+)")
+_SUBSCRIPT_DIGITS = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
+_MAGNITUDE = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def parse_money(text: str) -> float | None:
+    """Parse a scraped dollar amount into a float; None if there is no number."""
+    text = _SUBSCRIPT_ZEROS_RE.sub(
+        lambda m: "0." + "0" * int(m.group(1).translate(_SUBSCRIPT_DIGITS)), text
+    )
+    m = _MONEY_RE.search(text)
+    if m is None:
+        return None
+    value = float(m["num"].replace(",", ""))
+    if m["mag"]:
+        value *= _MAGNITUDE[m["mag"].upper()]
+    return -value if m["sign"] else value
+
+
+def parse_pct(text: str) -> float | None:
+    """Parse a scraped percentage ("1.2%") into a fraction (0.012); None if missing."""
+    m = _PCT_RE.search(text)
+    if m is None:
+        return None
+    value = float(m["num"].replace(",", "")) / 100
+    return -value if m["sign"] else value
+
+
+def typed_row(name: str, price: str, change1h: str, change24h: str, change7d: str,
+              volume: str, market_cap: str, link: str) -> Row:
+    """Turn one row of scraped strings into HEADERS order with numeric columns parsed."""
+    return [
+        name,
+        parse_money(price),
+        parse_pct(change1h),
+        parse_pct(change24h),
+        parse_pct(change7d),
+        parse_money(volume),
+        parse_money(market_cap),
+        link,
+    ]
+
+
+# A numeric rank ("12", "1,024") or the 'Buy' button text
+_RANK_OR_BUY = re.compile(r"[\d.,]*\d[\d.,]*|buy", re.IGNORECASE)
+
+
+def _is_name_noise(part: str) -> bool:
+    """True for rank numbers, 'Buy' text, and very short icon/button leftovers."""
+    return (_RANK_OR_BUY.fullmatch(part) is not None
+            or (len(part) <= 2 and not part.isalpha()))
+
+
+def clean_coin_name(name: str) -> str:
+    """Remove rank numbers, 'Buy' buttons, and extra whitespace from coin names."""
+    if "\n" not in name:                  # common case – nothing to split
+        name = name.strip()
+        return "" if _is_name_noise(name) else name
+
+    # Split by newlines, drop the noise, join remaining parts with space
+    return " ".join(
+        part for part in map(str.strip, name.split("\n"))
+        if part and not _is_name_noise(part)
+    )
+
+
+async def scrape_page(page) -> list[Row]:
     """
     Parse every visible coin‑row on the current CoinGecko page.
     Handles both the classic <table> layout and the newer div‑based layout.
     """
-    rows_data: list[list[str]] = []
+    rows_data: list[Row] = []
 
-    def clean_coin_name(name: str) -> str:
-        """Remove rank numbers, 'Buy' buttons, and extra whitespace from coin names."""
-        # Split by newlines and filter out unwanted parts
-        parts = [p.strip() for p in name.split("\n") if p.strip()]
-        
-        # Remove numeric ranks, 'Buy' text, and other noise
-        cleaned_parts = []
-        for part in parts:
-            # Skip if it's just a number (rank)
-            if part.replace(",", "").replace(".", "").isdigit():
-                continue
-            # Skip 'Buy' button text
-            if part.lower() == "buy":
-                continue
-            # Skip very short parts that are likely icons/buttons
-            if len(part) <= 2 and not part.isalpha():
-                continue
-            cleaned_parts.append(part)
-        
-        # Join remaining parts with space
-        return " ".join(cleaned_parts).strip()
-
-    # First, let's wait a bit longer for the page to fully load
-    await page.wait_for_timeout(3000)
-    
     print("    🔍 Analyzing page structure...")
     
-    # Debug: Check what's on the page
-    page_content = await page.evaluate("""() => {
-        return {
+    # One round‑trip for everything: table stats, Strategy A's structured rows
+    # and – only when A finds nothing – Strategy B's raw row text, all from a
+    # single traversal of the table rows.
+    extracted = await page.evaluate("""() => {
+        const rows = Array.from(document.querySelectorAll("table tbody tr"));
+        const counts = {
             hasTables: document.querySelectorAll('table').length,
-            hasTableRows: document.querySelectorAll('table tbody tr').length,
+            hasTableRows: rows.length,
             hasDivRows: document.querySelectorAll('[data-testid="table-row"]').length,
-            bodyText: document.body.innerText.substring(0, 500)
         };
-    }""")
-    
-    print(f"    📊 Found {page_content['hasTables']} tables, {page_content['hasTableRows']} table rows, {page_content['hasDivRows']} div rows")
 
-    # ── Strategy A: Use JavaScript to properly extract structured data from tables ──
-    js_data = await page.evaluate("""() => {
-        const results = [];
-        
-        // Find all table rows
-        const rows = document.querySelectorAll("table tbody tr");
-        
-        console.log('Found rows:', rows.length);
-        
-        rows.forEach((row, index) => {
+        // ── Strategy A: properly extract structured data from table rows ──
+        // CoinGecko's column order is stable, so positions are read once
+        // from the header row instead of sniffing every cell's content.
+        const headers = Array.from(document.querySelectorAll("table thead th"))
+            .map(th => th.innerText.trim().toLowerCase());
+        const columnOf = label => {
+            const exact = headers.indexOf(label);
+            return exact >= 0 ? exact : headers.findIndex(h => h.startsWith(label));
+        };
+        const col = {
+            price:     columnOf('price'),
+            change1h:  columnOf('1h'),
+            change24h: columnOf('24h'),
+            change7d:  columnOf('7d'),
+            volume:    columnOf('24h volume'),
+            marketCap: columnOf('market cap'),
+        };
+
+        const primary = [];
+        // Without a price column the header changed shape – leave it to B
+        if (col.price >= 0) rows.forEach(row => {
             const cells = row.querySelectorAll("td");
-            console.log(`Row ${index}: ${cells.length} cells`);
-            
             if (cells.length < 7) return;
             
+            const textAt = i => (i >= 0 && cells[i]) ? cells[i].innerText.trim() : '';
             const data = {};
             
-            // Get all cell text values first
-            const cellTexts = Array.from(cells).map(cell => cell.innerText.trim());
-            
             // Try to find the coin link to determine structure
             const coinLink = row.querySelector('a[href*="/coins/"]');
             if (coinLink) {
@@ -184,65 +483,36 @@ async def scrape_page(page) -> list[list[str]]:
                 data.name = coinLink.innerText.trim();
             } else {
                 // Fallback: use second cell for name (first is usually rank)
-                data.name = cellTexts[1] || '';
+                data.name = textAt(1);
                 data.coinUrl = '';
             }
             
-            // Try to identify which cells contain what based on content patterns
-            let dataIndex = 0;
-            for (let i = 0; i < cellTexts.length; i++) {
-                const text = cellTexts[i];
-                
-                // Skip rank numbers
-                if (i === 0 || (text && text.match(/^\d+$/))) continue;
-                
-                // Skip coin name (already got it)
-                if (text === data.name) continue;
-                
-                // Price (contains $ or starts with number with decimal)
-                if (!data.price && (text.includes('$') || text.match(/^\d+[\.,]\d/))) {
-                    data.price = text;
-                    continue;
-                }
-                
-                // Percentage changes (contain %)
-                if (text.includes('%')) {
-                    if (!data.change1h) data.change1h = text;
-                    else if (!data.change24h) data.change24h = text;
-                    else if (!data.change7d) data.change7d = text;
-                    continue;
-                }
-                
-                // Volume and market cap (large numbers with $ or B/M/K)
-                if (text.match(/[\$\d]/) && text.match(/[BMK]|billion|million/i)) {
-                    if (!data.volume) data.volume = text;
-                    else if (!data.marketCap) data.marketCap = text;
-                    continue;
-                }
-                
-                // If it's a number with commas or large number
-                if (text.match(/^\$?[\d,]+(\.\d+)?[BMK]?$/i)) {
-                    if (!data.volume) data.volume = text;
-                    else if (!data.marketCap) data.marketCap = text;
-                }
-            }
-            
-            // Set defaults for missing data
-            data.change1h = data.change1h || '';
-            data.change24h = data.change24h || '';
-            data.change7d = data.change7d || '';
-            data.volume = data.volume || '';
-            data.marketCap = data.marketCap || '';
-            data.graphLink = data.coinUrl || '';
+            data.price = textAt(col.price);
+            data.change1h = textAt(col.change1h);
+            data.change24h = textAt(col.change24h);
+            data.change7d = textAt(col.change7d);
+            data.volume = textAt(col.volume);
+            data.marketCap = textAt(col.marketCap);
+            data.graphLink = data.coinUrl;
             
             if (data.name) {
-                results.push(data);
+                primary.push(data);
             }
         });
-        
-        return results;
+
+        // ── Strategy B: raw row text, only needed when A came up empty ──
+        const fallback = primary.length ? [] : rows.map(row => {
+            const link = row.querySelector('a[href*="/coins/"]');
+            return { text: row.innerText, url: link ? link.href : '' };
+        });
+
+        return { counts, primary, fallback };
     }""")
 
+    counts = extracted["counts"]
+    print(f"    📊 Found {counts['hasTables']} tables, {counts['hasTableRows']} table rows, {counts['hasDivRows']} div rows")
+
+    js_data = extracted["primary"]
     print(f"    ✅ JavaScript extraction found {len(js_data)} coins")
 
     for item in js_data:
@@ -250,7 +520,7 @@ async def scrape_page(page) -> list[list[str]]:
         if not coin_name:
             continue
             
-        rows_data.append([
+        rows_data.append(typed_row(
             coin_name,
             item.get('price', ''),
             item.get('change1h', ''),
@@ -259,28 +529,13 @@ async def scrape_page(page) -> list[list[str]]:
             item.get('volume', ''),
             item.get('marketCap', ''),
             item.get('graphLink', ''),
-        ])
+        ))
 
     # ── Strategy B: Fallback - get all text from rows and parse manually ──
     if not rows_data:
         print("    ⚠️  Trying fallback method...")
         
-        fallback_data = await page.evaluate("""() => {
-            const results = [];
-            const rows = document.querySelectorAll("table tbody tr");
-            
-            rows.forEach(row => {
-                const allText = row.innerText;
-                const link = row.querySelector('a[href*="/coins/"]');
-                
-                results.push({
-                    text: allText,
-                    url: link ? link.href : ''
-                });
-            });
-            
-            return results;
-        }""")
+        fallback_data = extracted["fallback"]
         
         print(f"    📝 Fallback found {len(fallback_data)} rows of raw text")
         
@@ -297,9 +552,7 @@ async def scrape_page(page) -> list[list[str]]:
             # Filter out rank and Buy
             filtered = []
             for part in parts:
-                if part.replace(',', '').replace('.', '').isdigit() and len(part) < 4:
-                    continue
-                if part.lower() == 'buy':
+                if len(part) < 4 and _RANK_OR_BUY.fullmatch(part):
                     continue
                 filtered.append(part)
             
@@ -310,7 +563,7 @@ async def scrape_page(page) -> list[list[str]]:
             if not coin_name:
                 continue
             
-            rows_data.append([
+            rows_data.append(typed_row(
                 coin_name,
                 filtered[1] if len(filtered) > 1 else '',
                 filtered[2] if len(filtered) > 2 else '',
@@ -319,127 +572,87 @@ async def scrape_page(page) -> list[list[str]]:
                 filtered[5] if len(filtered) > 5 else '',
                 filtered[6] if len(filtered) > 6 else '',
                 url,
-            ])
+            ))
 
     print(f"    📦 Total rows extracted: {len(rows_data)}")
     return rows_data
 
 
-async def click_next_page(page) -> bool:
+async def count_pages(page) -> int:
     """
-    Attempts to click the "Next" pagination button using multiple strategies.
-    Returns True if successfully clicked, False if no next button found.
+    Read the pagination bar of the current CoinGecko page and return the
+    highest page number linked from it (1 if there is no pagination).
     """
-    # Strategy 1: Look for the right arrow icon with cursor pointer
-    try:
-        next_button = await page.query_selector('i.fa-angle-right.tw-cursor-pointer')
-        if next_button:
-            # Check if it's disabled (has opacity class)
-            is_disabled = await page.evaluate("""(el) => {
-                const classList = Array.from(el.classList);
-                return classList.some(c => c.startsWith('tw-opacity-'));
-            }""", next_button)
-            
-            if not is_disabled:
-                # Click the parent element (usually the button/link container)
-                parent = await next_button.evaluate_handle('el => el.parentElement')
-                await parent.click()
-                print("    ✓ Clicked next button (Strategy 1: icon)")
-                await page.wait_for_timeout(2000)  # Wait for page to load
-                return True
-    except Exception as e:
-        print(f"    Strategy 1 failed: {e}")
+    return await page.evaluate("""() => {
+        let last = 1;
+        document.querySelectorAll('a[href*="page="]').forEach(a => {
+            const m = a.href.match(/[?&]page=(\\d+)/);
+            if (m) last = Math.max(last, parseInt(m[1], 10));
+        });
+        return last;
+    }""")
 
-    # Strategy 2: Look for clickable pagination elements
-    try:
-        # Try to find a clickable pagination arrow/button
-        selectors = [
-            'a[rel="next"]',
-            'button[aria-label*="Next"]',
-            'button[aria-label*="next"]',
-            '[class*="pagination"] a:last-child',
-            '[class*="pagination"] button:last-child',
-        ]
-        
-        for selector in selectors:
-            element = await page.query_selector(selector)
-            if element:
-                is_disabled = await element.evaluate(
-                    '(el) => el.disabled || el.classList.contains("disabled") || el.getAttribute("aria-disabled") === "true"'
-                )
-                if not is_disabled:
-                    await element.click()
-                    print(f"    ✓ Clicked next button (Strategy 2: {selector})")
-                    await page.wait_for_timeout(2000)
-                    return True
-    except Exception as e:
-        print(f"    Strategy 2 failed: {e}")
 
-    # Strategy 3: JavaScript click on the icon's parent
+async def wait_for_table(page, timeout: int = 20_000) -> bool:
+    """
+    Wait until the coin table is populated: a full page of rows, or – on a
+    short last page – any rows once the document has finished loading.
+    Returns False on timeout.
+    """
     try:
-        clicked = await page.evaluate("""() => {
-            const icons = document.querySelectorAll('i.fa-angle-right.tw-cursor-pointer');
-            for (const icon of icons) {
-                const classList = Array.from(icon.classList);
-                const isDisabled = classList.some(c => c.startsWith('tw-opacity-'));
-                if (!isDisabled && icon.parentElement) {
-                    icon.parentElement.click();
-                    return true;
-                }
-            }
-            return false;
-        }""")
-        
-        if clicked:
-            print("    ✓ Clicked next button (Strategy 3: JS click)")
-            await page.wait_for_timeout(2000)
-            return True
+        await page.wait_for_function(
+            f"""() => {{
+                const n = document.querySelectorAll('table tbody tr').length;
+                return n >= {TABLE_FULL_ROWS} || (n > 0 && document.readyState === 'complete');
+            }}""",
+            timeout=timeout,
+        )
+        return True
     except Exception as e:
-        print(f"    Strategy 3 failed: {e}")
+        print(f"    ⚠️  Table wait timeout: {e}")
+        return False
+
 
-    # Strategy 4: Find any element containing the right arrow and click it
+async def load_page(page, url: str) -> bool:
+    """
+    Navigate to a CoinGecko listing URL and wait for the coin table to render.
+    Returns False if navigation failed completely.
+    """
+    # Use 'domcontentloaded' instead of 'networkidle' to avoid timeout issues
     try:
-        clicked = await page.evaluate("""() => {
-            // Look for the FontAwesome right arrow icon
-            const allElements = Array.from(document.querySelectorAll('*'));
-            for (const el of allElements) {
-                if (el.classList.contains('fa-angle-right') || 
-                    el.classList.contains('fa-chevron-right') ||
-                    el.classList.contains('fa-arrow-right')) {
-                    
-                    // Check if clickable (has cursor pointer)
-                    const style = window.getComputedStyle(el);
-                    if (style.cursor === 'pointer') {
-                        // Click the element or its parent
-                        const clickable = el.closest('a, button') || el.parentElement;
-                        if (clickable) {
-                            clickable.click();
-                            return true;
-                        }
-                    }
-                }
-            }
-            return false;
-        }""")
-        
-        if clicked:
-            print("    ✓ Clicked next button (Strategy 4: comprehensive search)")
-            await page.wait_for_timeout(2000)
-            return True
+        await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
     except Exception as e:
-        print(f"    Strategy 4 failed: {e}")
+        print(f"    ⚠️  Navigation error ({url}): {e}")
+        print("    🔄 Retrying with 'load' wait state...")
+        try:
+            await page.goto(url, wait_until="load", timeout=60_000)
+        except Exception as e2:
+            print(f"    ✗  Navigation failed completely ({url}): {e2}")
+            return False
 
-    return False
+    # Wait for the coin‑row table to fill in; a fixed sleep is the last resort
+    if not await wait_for_table(page):
+        print("    ⏳ Waiting additional 5 seconds...")
+        await page.wait_for_timeout(5_000)
+    return True
 
 
-async def scrape_all() -> list[list[str]]:
+async def scrape_all(sink: ExcelSink) -> list[Row]:
     """
-    Launch Playwright, iterate through every paginated page on CoinGecko,
-    and collect all coin rows. Saves all data progressively to a single Excel file
-    that gets updated after each page is scraped.
+    Get the page count from the JSON API, launch Playwright, then let a
+    pool of SCRAPE_CONCURRENCY warm tabs work through every page from a queue.
+    If the API is unreachable, page 1 is scraped first and its pagination
+    bar supplies the count instead.
+    Each finished page is handed to the Excel sink and checkpointed; pages
+    left in a recent checkpoint by an interrupted run are reused, not re‑scraped.
+    Raises IncompleteScrapeError if any page came back empty or failed.
     """
-    all_rows: list[list[str]] = []
-    page_num = 1
+    resumed = load_checkpoint()
+    results: dict[int, list[Row]] = {}
+    if not resumed:
+        CHECKPOINT_PATH.unlink(missing_ok=True) # records are appended – start clean
+
+    last_page = await fetch_site_page_count()
 
     async with async_playwright() as pw:
         browser = await pw.chromium.launch(headless=True)
@@ -450,8 +663,10 @@ async def scrape_all() -> list[list[str]]:
                 "AppleWebKit/537.36 (KHTML, like Gecko) "
                 "Chrome/120.0.0.0 Safari/537.36"
             ),
+            java_script_enabled=True,
+            bypass_csp=True,
+            service_workers="block",
         )
-        page = await context.new_page()
 
         # Block ad / tracker domains so background connections don't stall us
         BLOCKED = [
@@ -459,97 +674,102 @@ async def scrape_all() -> list[list[str]]:
             "googletagmanager.com", "facebook.net", "hotjar.com",
             "interstitial", "ads.coingecko", "adtarget", "pubmatic",
         ]
-        await page.route(
-            "**/*",
-            lambda route: (
-                route.abort()
-                if any(b in route.request.url for b in BLOCKED)
-                else route.continue_()
-            ),
-        )
+        # Logos, sparklines, fonts and CSS don't affect the text we extract –
+        # only documents, scripts and XHR/fetch calls are let through
+        BLOCKED_TYPES = {"image", "media", "font", "stylesheet", "other"}
 
-        url = BASE_URL                      # first page (no ?page= param)
+        def block_requests(route):
+            request = route.request
+            if (request.resource_type in BLOCKED_TYPES
+                    or any(b in request.url for b in BLOCKED)):
+                return route.abort()
+            return route.continue_()
 
-        while True:
+        # Applied on the context so every pooled tab shares it
+        await context.route("**/*", block_requests)
+
+        # Warm tabs, reused for every page instead of opened/closed per URL
+        pool = [await context.new_page() for _ in range(SCRAPE_CONCURRENCY)]
+
+        async def scrape_one(page, page_num: int) -> list[Row]:
+            url = BASE_URL if page_num == 1 else f"{BASE_URL}?page={page_num}"
             print(f"  ► Scraping page {page_num}  …  {url}")
-            
-            # Use 'domcontentloaded' instead of 'networkidle' to avoid timeout issues
-            try:
-                await page.goto(url, wait_until="domcontentloaded", timeout=60_000)
-                # Give a bit more time for dynamic content to load
-                await page.wait_for_timeout(2000)
-            except Exception as e:
-                print(f"    ⚠️  Navigation error: {e}")
-                print("    🔄 Retrying with 'load' wait state...")
-                try:
-                    await page.goto(url, wait_until="load", timeout=60_000)
-                    await page.wait_for_timeout(2000)
-                except Exception as e2:
-                    print(f"    ✗  Navigation failed completely: {e2}")
-                    break
-
-            # Wait longer for the coin‑row table to render
-            print("    ⏳ Waiting for table to load...")
-            try:
-                await page.wait_for_selector(
-                    'table tbody tr, [data-testid="table-row"]',
-                    timeout=20_000
-                )
-                print("    ✓ Table found!")
-            except Exception as e:
-                print(f"    ⚠️  Table selector timeout: {e}")
-                print("    ⏳ Waiting additional 5 seconds...")
-                await page.wait_for_timeout(5_000)
+            if not await load_page(page, url):
+                return []
 
             rows = await scrape_page(page)
             if not rows:
                 print(f"    ✗ No rows found on page {page_num}")
-                
+
                 # Take a screenshot for debugging
                 screenshot_path = OUTPUT_DIR / f"debug_page_{page_num}.png"
                 await page.screenshot(path=str(screenshot_path))
                 print(f"    📸 Screenshot saved to {screenshot_path.name} for debugging")
-                
-                # Try one more time with a longer wait
-                if page_num == 1:
-                    print("    🔄 Retrying page 1 with longer wait...")
-                    await page.wait_for_timeout(10_000)
-                    rows = await scrape_page(page)
-                    
-                if not rows:
-                    print("    ✗ Still no rows found – stopping.")
-                    break
-
-            all_rows.extend(rows)
-            print(f"    ✓ {len(rows)} coins collected  (total so far: {len(all_rows)})")
-
-            # ── Update the single Excel file with all data collected so far ──
-            print(f"    💾 Updating Excel file with {len(all_rows)} total coins...")
-            build_excel(all_rows)
-
-            # ── Try to click the next page button ──
-            print("    → Attempting to navigate to next page...")
-            success = await click_next_page(page)
-            
-            if not success:
-                print("    ✗ Could not find or click next button – all pages scraped.")
-                break
-            
-            # Wait for the new page content to load
-            try:
-                await page.wait_for_selector(
-                    'table tbody tr, [data-testid="table-row"]',
-                    timeout=10_000
-                )
-            except Exception:
-                await page.wait_for_timeout(3_000)
-            
-            page_num += 1
-            url = page.url  # Update URL to reflect current page
+
+                # Try one more time once the network has gone quiet
+                print(f"    🔄 Retrying page {page_num} after network idle...")
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=10_000)
+                except Exception:
+                    pass
+                rows = await scrape_page(page)
+
+            if rows:
+                results[page_num] = rows
+                print(f"    ✓ Page {page_num}: {len(rows)} coins collected")
+                await write_in_background(save_checkpoint, page_num, rows)
+            return rows
+
+        first_page = 1
+        if last_page is None:
+            # ── No API count – page 1 tells us how many pages there are ──
+            resumed.pop(1, None)
+            first_rows = await scrape_one(pool[0], 1)
+            await write_in_background(sink.append_page, 1, first_rows)
+            if not first_rows:
+                print("    ✗ Still no rows found – stopping.")
+                await browser.close()
+                return []
+            last_page = await count_pages(pool[0])
+            first_page = 2
+
+        # ── Pages already in the checkpoint go straight to the sink ──
+        for page_num in range(first_page, last_page + 1):
+            if page_num in resumed:
+                results[page_num] = resumed[page_num]
+                await write_in_background(sink.append_page, page_num, resumed[page_num])
+        if results:
+            print(f"  ♻️  Resuming – {len(results)} pages reused from the checkpoint")
+
+        # ── Each pooled tab pulls page numbers off the queue until it's empty ──
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for page_num in range(first_page, last_page + 1):
+            if page_num not in resumed:
+                queue.put_nowait(page_num)
+        print(f"  📄 {queue.qsize()} pages to scrape with {len(pool)} tabs")
+
+        async def worker(page) -> None:
+            while True:
+                try:
+                    page_num = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                rows: list[Row] = []
+                try:
+                    rows = await scrape_one(page, page_num)
+                except Exception as e:
+                    print(f"    ✗ Page {page_num} failed: {e}")
+                await write_in_background(sink.append_page, page_num, rows)
+
+        await asyncio.gather(*(worker(page) for page in pool))
 
         await browser.close()
 
-    return all_rows
+    # Scraped pages stay in the checkpoint, so a rerun only fetches the gaps
+    missing = [n for n in range(1, last_page + 1) if n not in results]
+    if missing:
+        raise IncompleteScrapeError(missing, last_page)
+    return [row for n in sorted(results) for row in results[n]]
 
 
 # ──────────────────────────────────────────────
@@ -557,99 +777,297 @@ async def scrape_all() -> list[list[str]]:
 # ──────────────────────────────────────────────
 
 # Colour palette
-DARK_BG      = PatternFill("solid", fgColor="1A1A2E")   # header bg
-GOLD_FONT    = Font(name="Arial", bold=True, size=11, color="FFD700")
-WHITE_FONT   = Font(name="Arial", size=10, color="FFFFFF")
-BLACK_FONT   = Font(name="Arial", size=10, color="1A1A2E")
-ALT_ROW_FILL = PatternFill("solid", fgColor="F2F7FC")
-THIN_BORDER  = Border(
-    left  =Side(style="thin", color="D0D8E0"),
-    right =Side(style="thin", color="D0D8E0"),
-    top   =Side(style="thin", color="D0D8E0"),
-    bottom=Side(style="thin", color="D0D8E0"),
+DARK_BG      = "1A1A2E"   # header bg
+GOLD         = "FFD700"
+WHITE        = "FFFFFF"
+BLACK        = "1A1A2E"
+GREY         = "6B7280"
+ALT_ROW_BG   = "F2F7FC"
+BORDER_GREY  = "D0D8E0"
+
+# Hand‑tuned column widths
+COL_WIDTHS = {
+    0: 34,   # Coin Name
+    1: 16,   # Price
+    2: 10,   # 1h
+    3: 10,   # 24h
+    4: 10,   # 7d
+    5: 20,   # 24h Volume
+    6: 22,   # Market Cap
+    7: 50,   # Coin Link
+}
+COL_LETTERS = [chr(ord("A") + i) for i in range(len(HEADERS))]
+
+# ── Static xlsx parts ──
+# The sheet layout is fixed (one sheet, 8 columns, uniform styling), so the
+# package is written by hand: these parts never change, and the sheet XML
+# is streamed row by row from the templates further down.
+CONTENT_TYPES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>\
+</Types>"""
+
+ROOT_RELS_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+WORKBOOK_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets><sheet name="CoinGecko Data" sheetId="1" r:id="rId1"/></sheets>\
+<calcPr fullCalcOnLoad="1"/>\
+</workbook>"""
+
+WORKBOOK_RELS_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>\
+</Relationships>"""
+
+# Custom number formats (ids from 164 up are free for custom codes)
+NUM_FORMATS = {
+    164: "$#,##0.00######",    # price – cents, plus extra digits for tiny prices
+    165: "0.0%",               # 1h / 24h / 7d change
+    166: "$#,##0",             # volume / market cap
+}
+
+# Data‑cell kinds: (horizontal alignment, number format id); 0 = General
+DATA_KINDS = [
+    ("left",   0),      # 0 – coin name
+    ("center", 0),      # 1 – plain text (coin link)
+    ("center", 164),    # 2 – price
+    ("center", 165),    # 3 – % change
+    ("center", 166),    # 4 – dollar amount
+]
+COL_KINDS = [0, 2, 3, 3, 3, 4, 4, 1]      # kind of each HEADERS column
+
+# Cell style ids (index into <cellXfs> below): 3 fixed styles, then every
+# data kind unshaded, then every data kind on the alternate‑row fill
+S_TITLE, S_SUBTITLE, S_HEADER = range(1, 4)
+ROW_STYLES     = [4 + kind for kind in COL_KINDS]
+ALT_ROW_STYLES = [4 + len(DATA_KINDS) + kind for kind in COL_KINDS]
+
+_DATA_XF_TMPL = (
+    '<xf numFmtId="{fmt}" fontId="4" fillId="{fill}" borderId="1" xfId="0" '
+    'applyNumberFormat="1" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="{align}" vertical="center" wrapText="1"/></xf>'
 )
-CENTER = Alignment(horizontal="center", vertical="center", wrap_text=True)
-LEFT   = Alignment(horizontal="left",   vertical="center", wrap_text=True)
 
-
-def build_excel(rows: list[list[str]]) -> Path:
+STYLES_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">\
+<numFmts count="{len(NUM_FORMATS)}">{"".join(
+    f'<numFmt numFmtId="{fmt_id}" formatCode="{code}"/>' for fmt_id, code in NUM_FORMATS.items()
+)}</numFmts>\
+<fonts count="5">\
+<font><sz val="11"/><name val="Calibri"/></font>\
+<font><b/><sz val="16"/><color rgb="FF{WHITE}"/><name val="Arial"/></font>\
+<font><i/><sz val="10"/><color rgb="FF{GREY}"/><name val="Arial"/></font>\
+<font><b/><sz val="11"/><color rgb="FF{GOLD}"/><name val="Arial"/></font>\
+<font><sz val="10"/><color rgb="FF{BLACK}"/><name val="Arial"/></font>\
+</fonts>\
+<fills count="4">\
+<fill><patternFill patternType="none"/></fill>\
+<fill><patternFill patternType="gray125"/></fill>\
+<fill><patternFill patternType="solid"><fgColor rgb="FF{DARK_BG}"/></patternFill></fill>\
+<fill><patternFill patternType="solid"><fgColor rgb="FF{ALT_ROW_BG}"/></patternFill></fill>\
+</fills>\
+<borders count="2">\
+<border><left/><right/><top/><bottom/><diagonal/></border>\
+<border>{"".join(f'<{side} style="thin"><color rgb="FF{BORDER_GREY}"/></{side}>'
+                 for side in ("left", "right", "top", "bottom"))}<diagonal/></border>\
+</borders>\
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>\
+<cellXfs count="{4 + 2 * len(DATA_KINDS)}">\
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">\
+<alignment horizontal="center" vertical="center"/></xf>\
+<xf numFmtId="0" fontId="2" fillId="0" borderId="0" xfId="0" applyFont="1" applyAlignment="1">\
+<alignment horizontal="center"/></xf>\
+<xf numFmtId="0" fontId="3" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" applyBorder="1" applyAlignment="1">\
+<alignment horizontal="center" vertical="center" wrapText="1"/></xf>\
+{"".join(_DATA_XF_TMPL.format(fmt=fmt, fill=fill, align=align)
+         for fill in (0, 3) for align, fmt in DATA_KINDS)}\
+</cellXfs>\
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>\
+</styleSheet>"""
+
+# ── Sheet templates ──
+HEADER_ROW = 3                                   # 1‑based sheet row of HEADERS
+
+SHEET_HEAD_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheetViews><sheetView tabSelected="1" workbookViewId="0">\
+<pane ySplit="{HEADER_ROW}" topLeftCell="A{HEADER_ROW + 1}" activePane="bottomLeft" state="frozen"/>\
+<selection pane="bottomLeft" activeCell="A{HEADER_ROW + 1}" sqref="A{HEADER_ROW + 1}"/>\
+</sheetView></sheetViews>\
+<sheetFormatPr defaultRowHeight="20" customHeight="1"/>\
+<cols>{"".join(f'<col min="{c + 1}" max="{c + 1}" width="{w}" customWidth="1"/>'
+               for c, w in COL_WIDTHS.items())}</cols>\
+<sheetData>"""
+
+SHEET_TAIL_XML = f"""</sheetData>\
+<mergeCells count="2">\
+<mergeCell ref="A1:{COL_LETTERS[-1]}1"/><mergeCell ref="A2:{COL_LETTERS[-1]}2"/>\
+</mergeCells>\
+</worksheet>"""
+
+ROW_TMPL       = '<row r="{r}">{cells}</row>'
+ROW_HT_TMPL    = '<row r="{r}" ht="{ht}" customHeight="1">{cells}</row>'
+CELL_TMPL      = '<c r="{ref}" s="{s}" t="s"><v>{v}</v></c>'     # v = shared string index
+NUM_CELL_TMPL  = '<c r="{ref}" s="{s}"><v>{v}</v></c>'
+EMPTY_CELL_TMPL = '<c r="{ref}" s="{s}"/>'
+FORMULA_CELL_TMPL = '<c r="{ref}" s="{s}" t="str"><f>{f}</f></c>'
+
+# Shared‑string table: every distinct text is stored once, cells refer to it
+SST_HEAD_TMPL = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+count="{count}" uniqueCount="{unique}">"""
+SST_ITEM_TMPL = '<si><t xml:space="preserve">{v}</t></si>'
+
+# XML special characters, plus control characters XML 1.0 can't carry at all
+_XML_UNSAFE = re.compile(r'[&<>"\x00-\x08\x0b\x0c\x0e-\x1f]')
+_XML_ENTITIES = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}
+
+
+def xml_escape(value: str) -> str:
+    """Escape a cell value for use as XML text."""
+    return _XML_UNSAFE.sub(lambda m: _XML_ENTITIES.get(m.group(), ""), value)
+
+
+class ExcelSink:
     """
-    Create a professionally styled .xlsx workbook from the scraped rows.
-    Overwrites the file each time to progressively add more data.
+    Streaming Excel writer that stays open for the whole scrape.
+    Pages are appended as they arrive and their rows are rendered straight
+    into the sheet XML inside the .xlsx zip – rows already written are
+    never touched again. Text is interned into a shared‑string table that
+    is written out on close(). The workbook is created on the first append, so a
+    scrape that collects nothing leaves no empty file behind.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "CoinGecko Data"
-
-    # ── Title row ──
-    ws.merge_cells("A1:H1")
-    title_cell = ws["A1"]
-    title_cell.value   = "CoinGecko – Cryptocurrency Market Data"
-    title_cell.font    = Font(name="Arial", bold=True, size=16, color="FFFFFF")
-    title_cell.fill    = DARK_BG
-    title_cell.alignment = Alignment(horizontal="center", vertical="center")
-    ws.row_dimensions[1].height = 32
-
-    # ── Subtitle / timestamp ──
-    ws.merge_cells("A2:H2")
-    sub_cell = ws["A2"]
-    sub_cell.value   = f"Scraped on  {datetime.now().strftime('%d %b %Y, %H:%M')}  •  {len(rows)} coins"
-    sub_cell.font    = Font(name="Arial", italic=True, size=10, color="6B7280")
-    sub_cell.alignment = Alignment(horizontal="center")
-    ws.row_dimensions[2].height = 20
-
-    # ── Header row (row 3) ──
-    header_row = 3
-    for col_idx, header in enumerate(HEADERS, start=1):
-        cell = ws.cell(row=header_row, column=col_idx)
-        cell.value      = header
-        cell.font       = GOLD_FONT
-        cell.fill       = DARK_BG
-        cell.alignment  = CENTER
-        cell.border     = THIN_BORDER
-    ws.row_dimensions[header_row].height = 22
-
-    # ── Data rows (start at row 4) ──
-    for row_idx, row_data in enumerate(rows, start=header_row + 1):
-        is_alt = (row_idx % 2 == 0)           # alternating row shading
-        for col_idx, value in enumerate(row_data, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.value     = value
-            cell.font      = BLACK_FONT
-            cell.border    = THIN_BORDER
-
-            # Coin name – left‑aligned; everything else centred
-            cell.alignment = LEFT if col_idx == 1 else CENTER
-
-            # Alternate row fill
-            if is_alt:
-                cell.fill = ALT_ROW_FILL
-
-        ws.row_dimensions[row_idx].height = 20
-
-    # ── Column widths (hand‑tuned) ──
-    col_widths = {
-        1: 34,   # Coin Name
-        2: 16,   # Price
-        3: 10,   # 1h
-        4: 10,   # 24h
-        5: 10,   # 7d
-        6: 20,   # 24h Volume
-        7: 22,   # Market Cap
-        8: 50,   # Coin Link
-    }
-    for col, width in col_widths.items():
-        ws.column_dimensions[get_column_letter(col)].width = width
-
-    # ── Freeze header row so it sticks when scrolling ──
-    ws.freeze_panes = ws.cell(row=header_row + 1, column=1)
 
-    # ── Sheet protection (optional: read‑only feel) – commented out so user can edit ──
-    # ws.protection.sheet = True
-
-    wb.save(str(XLSX_PATH))
-    # Don't print on every save to keep output clean - scraper prints the updates
-    return XLSX_PATH
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows_written = 0
+        self._zip = None
+        self._sheet = None
+        self._next_row = HEADER_ROW + 1
+        self._next_page = 1
+        self._pending: dict[int, list[Row]] = {}
+        self._shared: dict[str, int] = {}     # text → shared string index
+        self._string_refs = 0                 # cells pointing into the table
+
+    def _open(self) -> None:
+        self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        self._zip.writestr("_rels/.rels", ROOT_RELS_XML)
+        self._zip.writestr("xl/workbook.xml", WORKBOOK_XML)
+        self._zip.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+        self._zip.writestr("xl/styles.xml", STYLES_XML)
+        # The sheet is the only part still open – rows are streamed into it
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w")
+        self.write_header()
+
+    def _write(self, xml: str) -> None:
+        self._sheet.write(xml.encode("utf-8"))
+
+    def _cells_xml(self, row_idx: int, values, styles: list[int]) -> str:
+        """Build the <c> elements of one row, styling each column from `styles`."""
+        shared = self._shared
+        parts = []
+        for col_idx, (value, s) in enumerate(zip(values, styles)):
+            ref = f"{COL_LETTERS[col_idx]}{row_idx}"
+            if value is None or value == "" or value != value:      # blank / NaN
+                parts.append(EMPTY_CELL_TMPL.format(ref=ref, s=s))
+            elif isinstance(value, (int, float)):
+                parts.append(NUM_CELL_TMPL.format(ref=ref, s=s, v=repr(value)))
+            else:
+                index = shared.setdefault(str(value), len(shared))
+                parts.append(CELL_TMPL.format(ref=ref, s=s, v=index))
+                self._string_refs += 1
+        return "".join(parts)
+
+    def write_header(self) -> None:
+        """Title, subtitle, header row and sheet layout – written once."""
+        self._write(SHEET_HEAD_XML)
+
+        # ── Title row ──
+        title = ["CoinGecko – Cryptocurrency Market Data"] + [""] * (len(HEADERS) - 1)
+        self._write(ROW_HT_TMPL.format(r=1, ht=32, cells=self._cells_xml(1, title, [S_TITLE] * len(HEADERS))))
+
+        # ── Subtitle / timestamp ──
+        # The coin count isn't known yet (rows stream in later), so Excel
+        # counts the name column itself when the file is opened.
+        formula = (
+            f'"Scraped on  {datetime.now().strftime("%d %b %Y, %H:%M")}  •  "'
+            f'&COUNTA(A{HEADER_ROW + 1}:A1048576)&" coins"'
+        )
+        self._write(ROW_HT_TMPL.format(
+            r=2, ht=20,
+            cells=FORMULA_CELL_TMPL.format(ref="A2", s=S_SUBTITLE, f=xml_escape(formula)),
+        ))
+
+        # ── Header row (row 3) ──
+        self._write(ROW_HT_TMPL.format(
+            r=HEADER_ROW, ht=22, cells=self._cells_xml(HEADER_ROW, HEADERS, [S_HEADER] * len(HEADERS)),
+        ))
+
+    def append_rows(self, rows: list[Row]) -> None:
+        """Write rows below everything written so far."""
+        if not rows:
+            return
+        if self._zip is None:
+            self._open()
+
+        chunk = []
+        for row_data in rows:
+            row_idx = self._next_row
+            # Coin name – left‑aligned; everything else centred; even rows shaded
+            styles = ALT_ROW_STYLES if row_idx % 2 == 0 else ROW_STYLES
+            cells = self._cells_xml(row_idx, row_data, styles)
+            chunk.append(ROW_TMPL.format(r=row_idx, cells=cells))
+            self._next_row += 1
+        self._write("".join(chunk))
+        self.rows_written += len(rows)
+
+    def append_page(self, page_num: int, rows: list[Row]) -> None:
+        """
+        Hand over one scraped page (possibly empty). Pages may finish in any
+        order; they are held back until every earlier page has arrived, so
+        the sheet stays in rank order.
+        """
+        self._pending[page_num] = rows
+        while self._next_page in self._pending:
+            self.append_rows(self._pending.pop(self._next_page))
+            self._next_page += 1
+
+    def close(self) -> Path | None:
+        """Write any held‑back pages and finish the file. Returns its path, if any."""
+        for page_num in sorted(self._pending):
+            self.append_rows(self._pending.pop(page_num))
+        if self._zip is None:
+            return None
+        self._write(SHEET_TAIL_XML)
+        self._sheet.close()
+
+        # Table order must match the indices handed out (dicts keep insertion order)
+        with self._zip.open("xl/sharedStrings.xml", "w") as sst:
+            sst.write(SST_HEAD_TMPL.format(
+                count=self._string_refs, unique=len(self._shared),
+            ).encode("utf-8"))
+            sst.write("".join(
+                SST_ITEM_TMPL.format(v=xml_escape(text)) for text in self._shared
+            ).encode("utf-8"))
+            sst.write(b"</sst>")
+        self._zip.close()
+        self._zip = None
+        return self.path
 
 
 # ──────────────────────────────────────────────
@@ -673,7 +1091,7 @@ def send_email(xlsx_path: Path) -> None:
         return
 
     # ── build MIME message ──
-    msg            = MIMEMultipart()
+    msg            = EmailMessage()
     msg["From"]    = smtp_user
     msg["To"]      = recipient
     msg["Subject"] = f"CoinGecko Data Export – {datetime.now().strftime('%d %b %Y')}"
@@ -684,13 +1102,16 @@ def send_email(xlsx_path: Path) -> None:
         f"Total coins scraped: see the subtitle row inside the Excel file.\n\n"
         "Best,\nCrypto Scraper Bot\n"
     )
-    msg.attach(MIMEText(body_text, "plain"))
+    msg.set_content(body_text)
 
     # ── attach Excel ──
     with open(xlsx_path, "rb") as f:
-        attachment = MIMEApplication(f.read(), Name=xlsx_path.name)
-    attachment["Content-Disposition"] = f'attachment; filename="{xlsx_path.name}"'
-    msg.attach(attachment)
+        msg.add_attachment(
+            f.read(),
+            maintype="application",
+            subtype="vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            filename=xlsx_path.name,
+        )
 
     # ── send ──
     try:
@@ -699,7 +1120,8 @@ def send_email(xlsx_path: Path) -> None:
             server.starttls()
             server.ehlo()
             server.login(smtp_user, smtp_pass)
-            server.sendmail(smtp_user, recipient, msg.as_string())
+            # Serialises straight to bytes – no extra as_string() copy
+            server.send_message(msg)
         print(f"  ✉️  Email sent to  {recipient}")
     except Exception as exc:
         print(f"  ✗  Email failed: {exc}")
@@ -712,7 +1134,7 @@ def send_email(xlsx_path: Path) -> None:
 
 async def main():
     print("\n╔══════════════════════════════════════════╗")
-    print("║   CoinGecko Scraper  –  Playwright       ║")
+    print("║   CoinGecko Scraper                      ║")
     print("╚══════════════════════════════════════════╝\n")
 
     print(f"  📁  All files will be saved to: output/\n")
@@ -720,20 +1142,45 @@ async def main():
     # Delete old Excel files before starting
     delete_old_excel_files()
     
-    print(f"  📊  File will be updated progressively: {XLSX_PATH.name}\n")
+    print(f"  📊  Rows are streamed into: {XLSX_PATH.name}\n")
 
-    print("  📥  Phase 1 – Scraping (file updates after each page) …")
-    rows = await scrape_all()
+    sink = ExcelSink(XLSX_PATH)
+    incomplete = None
+    try:
+        if USE_API:
+            print("  📥  Phase 1 – Fetching from the CoinGecko API …")
+            rows = await scrape_all_api(sink)
+        else:
+            print("  📥  Phase 1 – Scraping with Playwright …")
+            rows = await scrape_all(sink)
+    except IncompleteScrapeError as e:
+        incomplete = e
+    finally:
+        sink.close()
+
+    # A workbook with missing rank ranges is worse than none – don't keep or send it
+    if incomplete is not None:
+        XLSX_PATH.unlink(missing_ok=True)
+        print(f"\n  ✗  {incomplete}")
+        print("     → The workbook would have gaps, so it was deleted and not emailed.")
+        if USE_API:
+            print("     → Try again later, or lower API_CONCURRENCY if rate limited.")
+        else:
+            print("     → Run again – pages already scraped are reused from the checkpoint.")
+        return
 
     if not rows:
         print("\n  ✗  No data was collected. Exiting.")
         return
 
+    # The Excel file is complete – the checkpoint is no longer needed
+    CHECKPOINT_PATH.unlink(missing_ok=True)
+
     print(f"\n  ✅  Scraping complete! Total: {len(rows)} coins")
     print(f"  📄  Final file: {XLSX_PATH.name}")
 
     print(f"\n  📧  Phase 2 – Sending email …")
-    send_email(XLSX_PATH)
+    await asyncio.to_thread(send_email, XLSX_PATH)
 
     print("\n  ✅  Done!")
     print(f"  📁  Output folder: {PAGES_DIR}")
@@ -11,6 +11,8 @@ Gmail users:
     • Enable 2‑Factor Authentication on your Google account.
     • Generate an App Password at https://myaccount.google.com/apppasswords
     • Put that App Password (not your login password) into SMTP_PASS in .env
+    • SMTP_PORT=465 connects with implicit TLS (one round trip fewer than
+      STARTTLS on 587); SMTP_USE_SSL=1/0 forces either mode on other ports
 
 USAGE:
     # Auto-detect most recent Excel file
@@ -23,78 +25,317 @@ USAGE:
     
     # Specify custom recipient
     python email_sender.py myfile.xlsx recipient@example.com
+
+    # From Python – several emails over one SMTP connection
+    from email_sender import send_many
+    send_many([(Path("a.xlsx"), "x@example.com", None, None),
+               (Path("b.xlsx"), "y@example.com", "Report", "See attached")])
 """
 
+from __future__ import annotations
+
+import logging
 import os
 import sys
-import smtplib
-from email.mime.application import MIMEApplication
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+# smtplib, ssl, email.*, dotenv and the thread pool are imported inside the
+# functions that use them, so listing files or printing usage starts fast
+if TYPE_CHECKING:
+    import smtplib
+    import ssl
+    from email.message import EmailMessage
+
+# Raw bytes read per chunk when encoding an attachment: a multiple of 57,
+# so every chunk encodes to whole 76‑character base64 lines (about 1 MB)
+ATTACHMENT_CHUNK = 57 * 18_396
+
+# Progress and errors go through logging so batch callers can quiet them;
+# main() prints them to the console at LOG_LEVEL (default INFO)
+logger = logging.getLogger(__name__)
+
 
-from dotenv import load_dotenv
+@dataclass(frozen=True, slots=True)
+class SmtpConfig:
+    """SMTP settings read from the environment / .env file."""
+    host: str
+    port: int
+    user: str
+    password: str
+    recipient: str
+    log_level: str
+    use_ssl: bool           # implicit TLS (SMTP_SSL) instead of STARTTLS
+    workers: int            # parallel SMTP connections used by send_many()
 
 
-def send_email_with_attachment(file_path: Path, recipient: str = None, subject: str = None, body: str = None) -> bool:
+class ConfigError(Exception):
+    """Required SMTP settings are missing from the environment / .env file."""
+
+
+def missing_settings_help(smtp_user: str, smtp_pass: str, recipient: str = "",
+                          *, check_recipient: bool = True) -> str:
     """
-    Send an email with the specified file as an attachment.
-    
-    Args:
-        file_path: Path to the file to attach
-        recipient: Email address to send to (uses .env RECIPIENT_EMAIL if not provided)
-        subject: Email subject line (auto-generated if not provided)
-        body: Email body text (auto-generated if not provided)
+    Explain which .env settings are missing. RECIPIENT_EMAIL is only listed
+    when check_recipient is set – it's optional until a send needs it.
+    """
+    lines = [
+        "\n❌ ERROR: Missing email credentials!",
+        "   Please set the following in your .env file:",
+    ]
+    if not smtp_user:
+        lines.append("   - SMTP_USER (your email address)")
+    if not smtp_pass:
+        lines.append("   - SMTP_PASS (your app password)")
+    if check_recipient and not recipient:
+        lines.append("   - RECIPIENT_EMAIL (recipient's email address)")
+    lines += [
+        "\n   For Gmail users:",
+        "   1. Enable 2-Factor Authentication",
+        "   2. Generate App Password at: https://myaccount.google.com/apppasswords",
+        "   3. Use the App Password (not your login password) for SMTP_PASS\n",
+    ]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=1)
+def _get_smtp_config() -> SmtpConfig:
+    """
+    Load .env and read the SMTP settings – once per process; later calls
+    return the cached SmtpConfig, so the credentials are checked only once.
     
-    Returns:
-        True if email sent successfully, False otherwise
+    Raises:
+        ConfigError if SMTP_USER or SMTP_PASS is missing
     """
-    # Load environment variables
+    from dotenv import load_dotenv
+    
     load_dotenv()
+    env = os.environ
+    user = env.get("SMTP_USER", "")
+    password = env.get("SMTP_PASS", "")
+    if not (user and password):
+        # RECIPIENT_EMAIL is only a default, checked when a send needs it
+        raise ConfigError(missing_settings_help(user, password, check_recipient=False))
+    
+    port = int(env.get("SMTP_PORT", "587"))
+    use_ssl = env.get("SMTP_USE_SSL", "")
+    return SmtpConfig(
+        host=env.get("SMTP_HOST", "smtp.gmail.com"),
+        port=port,
+        user=user,
+        password=password,
+        recipient=env.get("RECIPIENT_EMAIL", ""),
+        log_level=env.get("LOG_LEVEL", "INFO").upper(),
+        # Port 465 is implicit TLS; SMTP_USE_SSL=1/0 overrides the guess
+        use_ssl=use_ssl.lower() in ("1", "true", "yes") if use_ssl else port == 465,
+        workers=int(env.get("SMTP_WORKERS", "4")),
+    )
+
+
+def log_smtp_error(error: Exception) -> None:
+    """Explain why connecting, logging in or sending failed."""
+    import smtplib
+    
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        logger.error("\n❌ ERROR: Authentication failed!")
+        logger.error("   For Gmail users:")
+        logger.error("   1. Make sure you're using an App Password, not your regular password")
+        logger.error("   2. Generate one at: https://myaccount.google.com/apppasswords")
+        logger.error("   3. Enable 2-Factor Authentication first if you haven't\n")
+    elif isinstance(error, smtplib.SMTPException):
+        logger.error("\n❌ ERROR: SMTP error occurred: %s\n", error)
+    else:
+        logger.error("\n❌ ERROR: Failed to send email: %s\n", error)
+
+
+@lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    """
+    One TLS context for every connection and reconnect, so the CA bundle is
+    loaded once per process (made on first use to keep ssl a lazy import).
+    """
+    import ssl
     
-    smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER", "")
-    smtp_pass = os.getenv("SMTP_PASS", "")
+    return ssl.create_default_context()
+
+
+def open_smtp(config: SmtpConfig) -> smtplib.SMTP:
+    """
+    Connect and run the EHLO / STARTTLS / EHLO / AUTH handshake – or just
+    EHLO / AUTH over SMTP_SSL, which is already encrypted once connected.
+    The host goes to the constructor so TLS can check the certificate
+    against it (connect() alone leaves the expected hostname empty).
+    """
+    import smtplib
     
-    # Use provided recipient or fall back to .env
-    if recipient is None:
-        recipient = os.getenv("RECIPIENT_EMAIL", "")
-    
-    # Validate credentials
-    if not all([smtp_user, smtp_pass, recipient]):
-        print("\n❌ ERROR: Missing email credentials!")
-        print("   Please set the following in your .env file:")
-        if not smtp_user:
-            print("   - SMTP_USER (your email address)")
-        if not smtp_pass:
-            print("   - SMTP_PASS (your app password)")
-        if not recipient:
-            print("   - RECIPIENT_EMAIL (recipient's email address)")
-        print("\n   For Gmail users:")
-        print("   1. Enable 2-Factor Authentication")
-        print("   2. Generate App Password at: https://myaccount.google.com/apppasswords")
-        print("   3. Use the App Password (not your login password) for SMTP_PASS\n")
-        return False
+    logger.info("   Connecting to %s:%s...", config.host, config.port)
+    if config.use_ssl:
+        server = smtplib.SMTP_SSL(config.host, config.port, timeout=30, context=_ssl_context())
+    else:
+        server = smtplib.SMTP(config.host, config.port, timeout=30)
+    try:
+        server.ehlo()
+        if not config.use_ssl:
+            server.starttls(context=_ssl_context())
+            server.ehlo()
+        logger.info("   Logging in as %s...", config.user)
+        server.login(config.user, config.password)
+    except BaseException:
+        server.close()
+        raise
+    return server
+
+
+class SmtpConnection:
+    """
+    A logged-in SMTP connection. After a drop it opens a fresh smtplib
+    object rather than reconnecting the old one.
+    """
+
+    def __init__(self, config: SmtpConfig):
+        self.config = config
+        self.server = open_smtp(config)
+
+    def reconnect(self) -> None:
+        """Replace the (dropped) connection with a new, logged-in one."""
+        self.close()
+        self.server = open_smtp(self.config)
+
+    def close(self) -> None:
+        """Say QUIT, or just close the socket if the server is already gone."""
+        import smtplib
+        
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+def is_connected(server: smtplib.SMTP) -> bool:
+    """
+    Health check: True if the server still answers RSET with 250.
+    RSET is as cheap as NOOP and also clears any half-finished transaction
+    left over from the previous message on a reused connection.
+    """
+    import smtplib
     
-    # Validate file exists
-    if not file_path.exists():
-        print(f"\n❌ ERROR: File not found: {file_path}\n")
+    try:
+        return server.rset()[0] == 250
+    except (smtplib.SMTPException, OSError):
         return False
+
+
+def attachment_part(file_path: Path) -> EmailMessage:
+    """
+    Build a base64 attachment part, encoding the file chunk by chunk so the
+    whole raw file and its encoded copy are never in memory at the same time.
+    """
+    import base64
+    import mimetypes
+    from email.message import EmailMessage
+    
+    encoded = []
+    with open(file_path, "rb", buffering=ATTACHMENT_CHUNK) as f:
+        while chunk := f.read(ATTACHMENT_CHUNK):
+            encoded.append(base64.encodebytes(chunk).decode("ascii"))
+    
+    # .xlsx → application/vnd.openxmlformats-officedocument.spreadsheetml.sheet
+    mime_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+    
+    part = EmailMessage()
+    part["Content-Type"] = mime_type
+    part["Content-Transfer-Encoding"] = "base64"
+    part.add_header("Content-Disposition", "attachment", filename=file_path.name)
+    part.set_payload("".join(encoded))
+    return part
+
+
+def send_with_retry(connection: SmtpConnection, recipient: str, message: EmailMessage,
+                    retries: int = 3, backoff: int = 30) -> None:
+    """
+    Send one message on an open connection, reconnecting if the server
+    dropped it and retrying temporary (4xx) failures – including a greylisted
+    RCPT TO – with exponential backoff (backoff, 2×backoff, 4×backoff...
+    seconds). Permanent errors are raised.
+    """
+    import smtplib
     
-    # Get file info
+    for attempt in range(retries + 1):
+        try:
+            if not is_connected(connection.server):
+                logger.warning("   🔄 Connection lost, reconnecting...")
+                connection.reconnect()
+            connection.server.send_message(
+                message, from_addr=connection.config.user, to_addrs=[recipient]
+            )
+            return
+        except smtplib.SMTPServerDisconnected:
+            if attempt == retries:
+                raise
+            reason = "Server disconnected"
+        except smtplib.SMTPResponseException as e:
+            if not 400 <= e.smtp_code < 500 or attempt == retries:
+                raise
+            reason = f"Temporary error {e.smtp_code}"
+        except smtplib.SMTPRecipientsRefused as e:
+            # Greylisting answers RCPT TO with 450/451 – not an SMTPResponseException
+            code = e.recipients[recipient][0] if recipient in e.recipients else 0
+            if not 400 <= code < 500 or attempt == retries:
+                raise
+            reason = f"Recipient temporarily refused ({code})"
+        
+        delay = backoff * 2 ** attempt
+        logger.warning("   ⏳ %s, retrying in %ss (%d/%d)...", reason, delay, attempt + 1, retries)
+        time.sleep(delay)
+
+
+@contextmanager
+def smtp_session(config: SmtpConfig = None):
+    """
+    Open one authenticated SMTP connection and yield it, so several emails
+    can be sent without repeating the TCP + TLS + login handshake.
+    Uses the settings from .env unless a config is given.
+
+    Example:
+        with smtp_session() as connection:
+            send_email_with_attachment(Path("a.xlsx"), connection=connection)
+            send_email_with_attachment(Path("b.xlsx"), connection=connection)
+    """
+    connection = SmtpConnection(config or _get_smtp_config())
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+def build_message(file_path: Path, subject: str = None, body: str = None,
+                  sender: str = None, now: datetime = None) -> EmailMessage:
+    """
+    Build the email (body text + encoded attachment) without a To: header,
+    so the same message can be sent to several recipients.
+    
+    Args:
+        file_path: Path to the file to attach
+        subject: Email subject line (auto-generated if not provided)
+        body: Email body text (auto-generated if not provided)
+        sender: From address (SMTP_USER from .env if not provided)
+        now: Time shown in the generated subject/body (current time if not provided)
+    
+    Raises:
+        OSError if the file can't be read
+    """
     file_size_mb = file_path.stat().st_size / (1024 * 1024)
     file_name = file_path.name
-    
-    print(f"\n📧 Preparing to send email...")
-    print(f"   From:       {smtp_user}")
-    print(f"   To:         {recipient}")
-    print(f"   Attachment: {file_name} ({file_size_mb:.2f} MB)")
+    now = now or datetime.now()
     
     # Auto-generate subject if not provided
     if subject is None:
-        subject = f"File: {file_name} - {datetime.now().strftime('%d %b %Y')}"
+        subject = f"File: {file_name} - {now:%d %b %Y}"
     
     # Auto-generate body if not provided
     if body is None:
@@ -105,138 +346,330 @@ Please find attached the file: {file_name}
 File details:
 • Name: {file_name}
 • Size: {file_size_mb:.2f} MB
-• Sent: {datetime.now().strftime('%d %b %Y at %H:%M')}
+• Sent: {now:%d %b %Y at %H:%M}
 
 Best regards,
 Automated Email Sender
 """
     
-    # Build MIME message
-    msg = MIMEMultipart()
-    msg["From"] = smtp_user
-    msg["To"] = recipient
+    # Build the message: plain‑text body, then the file as a second part
+    from email.message import EmailMessage
+    
+    msg = EmailMessage()
+    msg["From"] = sender or _get_smtp_config().user
     msg["Subject"] = subject
+    msg.set_content(body, cte="quoted-printable")      # 7‑bit safe on any server
+    msg.make_mixed()
+    msg.attach(attachment_part(file_path))
+    return msg
+
+
+def send_email_with_attachment(file_path: Path, recipient: str = None, subject: str = None,
+                               body: str = None, connection: SmtpConnection = None,
+                               message: EmailMessage = None) -> bool:
+    """
+    Send an email with the specified file as an attachment.
     
-    # Attach body text
-    msg.attach(MIMEText(body, "plain"))
+    Args:
+        file_path: Path to the file to attach
+        recipient: Email address to send to (uses .env RECIPIENT_EMAIL if not provided)
+        subject: Email subject line (auto-generated if not provided)
+        body: Email body text (auto-generated if not provided)
+        connection: Logged-in connection from smtp_session() to reuse
+                (a new connection is opened if not provided)
+        message: Already built message from build_message() to reuse
+                 (subject and body are then ignored)
     
-    # Attach file
+    Returns:
+        True if email sent successfully, False otherwise
+    """
     try:
-        with open(file_path, "rb") as f:
-            attachment = MIMEApplication(f.read(), Name=file_name)
-        attachment["Content-Disposition"] = f'attachment; filename="{file_name}"'
-        msg.attach(attachment)
-    except Exception as e:
-        print(f"\n❌ ERROR: Failed to read file: {e}\n")
+        config = _get_smtp_config()
+    except ConfigError as e:
+        logger.error("%s", e)
+        return False
+    
+    # Use provided recipient or fall back to .env
+    if recipient is None:
+        recipient = config.recipient
+    if not recipient:
+        logger.error("%s", missing_settings_help(config.user, config.password, recipient))
         return False
     
+    # Validate file exists
+    if not file_path.exists():
+        logger.error("\n❌ ERROR: File not found: %s\n", file_path)
+        return False
+    
+    if logger.isEnabledFor(logging.INFO):
+        file_size_mb = file_path.stat().st_size / (1024 * 1024)
+        logger.info("\n📧 Preparing to send email...")
+        logger.info("   From:       %s", config.user)
+        logger.info("   To:         %s", recipient)
+        logger.info("   Attachment: %s (%.2f MB)", file_path.name, file_size_mb)
+    
+    # Build the message (or reuse the one passed in) and address it
+    msg = message
+    if msg is None:
+        try:
+            msg = build_message(file_path, subject, body, config.user)
+        except Exception as e:
+            logger.error("\n❌ ERROR: Failed to read file: %s\n", e)
+            return False
+    del msg["To"]
+    msg["To"] = recipient
+    
     # Send email
     try:
-        print(f"   Connecting to {smtp_host}:{smtp_port}...")
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=30) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            print(f"   Logging in as {smtp_user}...")
-            server.login(smtp_user, smtp_pass)
-            print(f"   Sending email...")
-            server.sendmail(smtp_user, recipient, msg.as_string())
+        if connection is None:
+            with smtp_session(config) as own_connection:
+                logger.info("   Sending email...")
+                send_with_retry(own_connection, recipient, msg)
+        else:
+            logger.info("   Sending email...")
+            send_with_retry(connection, recipient, msg)
         
-        print(f"\n✅ SUCCESS! Email sent to {recipient}\n")
+        logger.info("\n✅ SUCCESS! Email sent to %s\n", recipient)
         return True
         
-    except smtplib.SMTPAuthenticationError:
-        print("\n❌ ERROR: Authentication failed!")
-        print("   For Gmail users:")
-        print("   1. Make sure you're using an App Password, not your regular password")
-        print("   2. Generate one at: https://myaccount.google.com/apppasswords")
-        print("   3. Enable 2-Factor Authentication first if you haven't\n")
-        return False
-        
-    except smtplib.SMTPException as e:
-        print(f"\n❌ ERROR: SMTP error occurred: {e}\n")
-        return False
-        
     except Exception as e:
-        print(f"\n❌ ERROR: Failed to send email: {e}\n")
+        log_smtp_error(e)
         return False
 
 
-def find_most_recent_excel() -> Path:
+def send_many(jobs: list[tuple[Path, str, str, str]], max_per_connection: int = 100,
+              workers: int = None) -> list[bool]:
     """
-    Automatically find the most recent Excel file in common locations.
-    Searches in: current directory, output/, and parent directory.
+    Send several emails from a pool of worker threads, each holding its own
+    SMTP connection. A connection is reused for up to max_per_connection
+    messages before its thread opens a fresh one (providers cap how much a
+    single connection may send). Within a thread, jobs with the same file,
+    subject and body share one built message; only the To: header changes.
     
-    Returns:
-        Path to the most recent .xlsx file found
+    Args:
+        jobs: (file_path, recipient, subject, body) tuples; recipient, subject
+              and body may be None to use the same defaults as
+              send_email_with_attachment
+        max_per_connection: Messages to send before reconnecting
+        workers: Parallel connections (SMTP_WORKERS from .env if not provided)
     
-    Raises:
-        FileNotFoundError if no Excel files are found
+    Returns:
+        One True/False per job, in the same order
     """
-    search_paths = [
-        Path("."),                    # Current directory
-        Path("output"),               # output folder
-        Path("../output"),            # output folder in parent
-        Path(".."),                   # Parent directory
-    ]
+    if not jobs:
+        return []
     
-    excel_files = []
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
     
-    # Search for Excel files in all paths
-    for search_path in search_paths:
-        if search_path.exists() and search_path.is_dir():
-            # Find all .xlsx files (but not temporary Excel files starting with ~)
-            found_files = [
-                f for f in search_path.glob("*.xlsx") 
-                if not f.name.startswith("~")
-            ]
-            excel_files.extend(found_files)
+    try:
+        config = _get_smtp_config()
+    except ConfigError as e:
+        logger.error("%s", e)
+        return [False] * len(jobs)
+    
+    workers = max(1, min(workers or config.workers, len(jobs)))
+    now = datetime.now()                       # one timestamp for the whole batch
+    local = threading.local()                  # per-thread connection + message cache
+    open_connections = set()                   # connections still to close at the end
+    opened = []                                # one item per connection opened
+    connect_failed = threading.Event()         # stop early if we can't connect/login
+    
+    def message_for(file_path: Path, subject: str, body: str) -> EmailMessage | None:
+        # Cached per thread: each thread rewrites the To: header of its own copy.
+        # None if the file can't be read (send_email_with_attachment then
+        # reports the error itself)
+        messages = local.__dict__.setdefault("messages", {})
+        key = (file_path, subject, body)
+        if key not in messages:
+            try:
+                messages[key] = build_message(file_path, subject, body, config.user, now)
+            except OSError:
+                messages[key] = None
+        return messages[key]
+    
+    def connection_for_thread() -> SmtpConnection:
+        connection = getattr(local, "connection", None)
+        if connection is None or local.sent >= max_per_connection:
+            if connection is not None:
+                open_connections.discard(connection)
+                connection.close()
+                local.connection = None
+            connection = SmtpConnection(config)
+            local.connection = connection
+            local.sent = 0
+            open_connections.add(connection)
+            opened.append(connection)
+        local.sent += 1
+        return connection
+    
+    def send_job(job: tuple[Path, str, str, str]) -> bool:
+        file_path, recipient, subject, body = job
+        if connect_failed.is_set():
+            return False
+        try:
+            connection = connection_for_thread()
+        except Exception as e:
+            # Connection or login failed: report once, skip the remaining jobs
+            if not connect_failed.is_set():
+                connect_failed.set()
+                log_smtp_error(e)
+            return False
+        return send_email_with_attachment(
+            file_path, recipient=recipient, subject=subject, body=body,
+            connection=connection, message=message_for(file_path, subject, body)
+        )
     
-    if not excel_files:
-        raise FileNotFoundError("No Excel files found in current directory or output/ folder")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(send_job, jobs))
+    finally:
+        for connection in open_connections:
+            connection.close()
+    
+    logger.info("📬 Sent %d of %d emails over %d connection(s)", sum(results), len(jobs), len(opened))
+    return results
+
+
+# Folders searched for Excel files, most likely first
+SEARCH_DIRS = [
+    ".",                          # Current directory
+    "output",                     # output folder
+    "../output",                  # output folder in parent
+    "..",                         # Parent directory
+]
+
+# Where reports normally land: crypto_scraper.py writes into output/ and
+# clears older workbooks first, so it usually holds exactly one. main() only
+# widens the search when it doesn't
+PRIMARY_DIRS = ["output"]
+
+# Per-folder listing cache: path -> (folder mtime in ns, its .xlsx entries).
+# A folder's mtime changes whenever a file is added, removed or renamed in it,
+# so an unchanged mtime means the cached listing is still complete.
+_DIR_CACHE: dict[str, tuple[int, list[os.DirEntry]]] = {}
+
+
+def _iter_xlsx(directory: str):
+    """
+    Yield the .xlsx files of one folder in a single scandir pass, skipping
+    ~$ Excel lock files and anything that isn't a regular file.
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name
+            if (name.endswith(".xlsx") and not name.startswith("~")
+                    and entry.is_file(follow_symlinks=False)):
+                yield entry
+
+
+def _scan_dir(directory: str) -> list[os.DirEntry]:
+    """
+    Return the .xlsx entries of one folder (skipping ~$ Excel lock files),
+    re-reading the folder only if it changed since the last scan.
+    """
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return []
     
-    # Sort by modification time (most recent first)
-    excel_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    cached = _DIR_CACHE.get(directory)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
     
-    return excel_files[0]
+    try:
+        entries = list(_iter_xlsx(directory))
+    except OSError:                       # not a folder / no permission
+        return []
+    
+    _DIR_CACHE[directory] = (mtime_ns, entries)
+    return entries
 
 
-def list_available_excel_files() -> list[Path]:
+def _distinct_dirs(directories: list[str]) -> list[str]:
     """
-    List all Excel files found in common locations.
-    
-    Returns:
-        List of Path objects for all .xlsx files found
+    Drop folders that don't exist or that are the same folder as an earlier
+    entry (e.g. ".." when run from output/ next to it). One realpath per
+    folder; the kept names stay as given so listed paths remain relative.
     """
-    search_paths = [
-        Path("."),
-        Path("output"),
-        Path("../output"),
-        Path(".."),
-    ]
+    seen = set()
+    distinct = []
+    for directory in directories:
+        real = os.path.realpath(directory)
+        if real not in seen and os.path.isdir(real):
+            seen.add(real)
+            distinct.append(directory)
+    return distinct
+
+
+def _file_key(entry: os.DirEntry) -> tuple:
+    """
+    Identify a file by device and inode. On Windows DirEntry.stat() leaves
+    both at 0, so ask os.stat() instead, and fall back to the resolved path
+    on filesystems that have no inode numbers at all.
+    """
+    # DirEntry caches this stat(); sorting by st_mtime later reuses it
+    st = entry.stat()
+    if not st.st_ino:
+        try:
+            st = os.stat(entry.path)
+        except OSError:                   # removed since the folder was scanned
+            pass
+    if not st.st_ino:
+        return (os.path.normcase(os.path.realpath(entry.path)),)
+    return (st.st_dev, st.st_ino)
+
+
+def _scan_excel(directories: list[str]) -> list[os.DirEntry]:
+    """
+    Collect the .xlsx files of several folders, dropping files reached twice
+    (same device and inode). Order is folder by folder, not by date.
+    """
+    seen: set[tuple] = set()
+    unique = []
+    for directory in _distinct_dirs(directories):
+        for entry in _scan_dir(directory):
+            key = _file_key(entry)
+            if key not in seen:
+                seen.add(key)
+                unique.append(entry)
+    return unique
+
+
+def find_most_recent_excel(directories: list[str] = SEARCH_DIRS) -> Path:
+    """
+    Automatically find the most recent Excel file in common locations.
+    Searches in: current directory, output/, and parent directory
+    (or only the given directories).
     
-    excel_files = []
+    Returns:
+        Path to the most recent .xlsx file found
     
-    for search_path in search_paths:
-        if search_path.exists() and search_path.is_dir():
-            found_files = [
-                f for f in search_path.glob("*.xlsx") 
-                if not f.name.startswith("~")
-            ]
-            excel_files.extend(found_files)
+    Raises:
+        FileNotFoundError if no Excel files are found
+    """
+    entries = _scan_excel(directories)
     
-    # Remove duplicates and sort by modification time
-    seen = set()
-    unique_files = []
-    for f in excel_files:
-        abs_path = f.resolve()
-        if abs_path not in seen:
-            seen.add(abs_path)
-            unique_files.append(f)
+    if not entries:
+        raise FileNotFoundError("No Excel files found in current directory or output/ folder")
     
-    unique_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    # Only the newest is needed – one pass, no sort
+    return Path(max(entries, key=lambda e: e.stat().st_mtime).path)
+
+
+def list_available_excel_files(directories: list[str] = SEARCH_DIRS) -> list[os.DirEntry]:
+    """
+    List all Excel files found in common locations (or the given directories).
     
-    return unique_files
+    Returns:
+        os.DirEntry objects for all .xlsx files found, most recent first;
+        their stat() is cached, so size and date cost no further syscalls
+        (use Path(entry.path) for a Path)
+    """
+    # Read every mtime once, then sort on the precomputed keys
+    keyed = [(entry.stat().st_mtime, entry) for entry in _scan_excel(directories)]
+    keyed.sort(key=lambda pair: pair[0], reverse=True)
+    return [entry for _, entry in keyed]
 
 
 def main():
@@ -255,7 +688,10 @@ def main():
         print("\n🔍 No file specified. Searching for Excel files...")
         
         try:
-            available_files = list_available_excel_files()
+            # A single report in the usual place is used without a full search
+            available_files = list_available_excel_files(PRIMARY_DIRS)
+            if len(available_files) != 1:
+                available_files = list_available_excel_files()
             
             if not available_files:
                 print("\n❌ No Excel files found!")
@@ -269,10 +705,11 @@ def main():
             
             if len(available_files) == 1:
                 # Only one file found - use it automatically
-                file_path = available_files[0]
-                print(f"\n✅ Found 1 Excel file: {file_path.name}")
+                entry = available_files[0]
+                file_path = Path(entry.path)
+                print(f"\n✅ Found 1 Excel file: {entry.name}")
                 print(f"   Location: {file_path.parent if file_path.parent != Path('.') else 'current directory'}")
-                print(f"   Modified: {datetime.fromtimestamp(file_path.stat().st_mtime).strftime('%d %b %Y at %H:%M')}")
+                print(f"   Modified: {datetime.fromtimestamp(entry.stat().st_mtime).strftime('%d %b %Y at %H:%M')}")
                 
                 # Ask for confirmation
                 response = input("\n📧 Send this file? (Y/n): ").strip().lower()
@@ -284,12 +721,14 @@ def main():
                 # Multiple files found - let user choose
                 print(f"\n📋 Found {len(available_files)} Excel files:\n")
                 
-                for idx, f in enumerate(available_files, 1):
-                    file_size_mb = f.stat().st_size / (1024 * 1024)
-                    mod_time = datetime.fromtimestamp(f.stat().st_mtime).strftime('%d %b %Y, %H:%M')
-                    location = f.parent if f.parent != Path('.') else 'current dir'
+                for idx, entry in enumerate(available_files, 1):
+                    st = entry.stat()                  # cached from the scan
+                    file_size_mb = st.st_size / (1024 * 1024)
+                    mod_time = datetime.fromtimestamp(st.st_mtime).strftime('%d %b %Y, %H:%M')
+                    location = os.path.dirname(entry.path)
+                    location = location if location not in ('', '.') else 'current dir'
                     
-                    print(f"   {idx}. {f.name}")
+                    print(f"   {idx}. {entry.name}")
                     print(f"      └─ {file_size_mb:.2f} MB | {mod_time} | {location}")
                 
                 # Ask user to choose
@@ -303,7 +742,7 @@ def main():
                         
                         choice_num = int(choice)
                         if 1 <= choice_num <= len(available_files):
-                            file_path = available_files[choice_num - 1]
+                            file_path = Path(available_files[choice_num - 1].path)
                             break
                         else:
                             print(f"   ⚠️  Please enter a number between 1 and {len(available_files)}")
@@ -324,6 +763,18 @@ def main():
     subject = sys.argv[3] if len(sys.argv) > 3 else None
     body = sys.argv[4] if len(sys.argv) > 4 else None
     
+    # Check the .env settings only now, so listing files and the usage
+    # errors above never load dotenv / smtplib
+    try:
+        config = _get_smtp_config()
+    except ConfigError as e:
+        print(e)
+        sys.exit(1)
+    
+    level = logging.getLevelName(config.log_level)
+    logging.basicConfig(level=level if isinstance(level, int) else logging.INFO,
+                        format="%(message)s", stream=sys.stdout)
+    
     # Send the email
     success = send_email_with_attachment(
         file_path=file_path,
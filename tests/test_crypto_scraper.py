@@ -0,0 +1,132 @@
+"""
+Pin down the hand‑written parts of crypto_scraper: the money / percentage
+parsers used on scraped text, and the streaming ExcelSink, whose output is
+read back with zipfile + ElementTree rather than trusted by eye.
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import crypto_scraper
+from crypto_scraper import ExcelSink, parse_money, parse_pct
+
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1,234.56", 1234.56),
+    ("$0.5", 0.5),
+    ("-$0.5", -0.5),
+    ("−$12", -12.0),                       # Unicode minus sign
+    ("$1.5K", 1.5e3),
+    ("$3M", 3e6),
+    ("$4.2B", 4.2e9),
+    ("$2T", 2e12),
+    ("$4.2b", 4.2e9),
+    ("$0.0₅1234", 0.000001234),            # five zeros after the point
+    ("$0.0₁₂5", 0.0000000000005),          # multi‑digit subscript count
+    ("—", None),
+    ("", None),
+])
+def test_parse_money(text, expected):
+    if expected is None:
+        assert parse_money(text) is None
+    else:
+        assert parse_money(text) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.2%", 0.012),
+    ("-0.35 %", -0.0035),
+    ("−4.1%", -0.041),
+    ("1,234.5%", 12.345),
+    ("0%", 0.0),
+    ("—", None),
+    ("", None),
+])
+def test_parse_pct(text, expected):
+    if expected is None:
+        assert parse_pct(text) is None
+    else:
+        assert parse_pct(text) == pytest.approx(expected, rel=1e-12)
+
+
+def coin(name: str, price) -> list:
+    return [name, price, 0.01, -0.02, None, 1e9, 2e10, f"https://example.com/{name}"]
+
+
+def read_sheet(path) -> tuple[list[list], ET.Element, ET.Element]:
+    """Return every sheet row as a list of cell values, plus both XML roots."""
+    with zipfile.ZipFile(path) as zf:
+        for part in zf.namelist():                  # every part is well‑formed XML
+            ET.fromstring(zf.read(part))
+        sst = ET.fromstring(zf.read("xl/sharedStrings.xml"))
+        sheet = ET.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+
+    strings = [si.find("m:t", NS).text or "" for si in sst.findall("m:si", NS)]
+    rows = []
+    for row in sheet.iterfind("m:sheetData/m:row", NS):
+        values = []
+        for cell in row.findall("m:c", NS):
+            v = cell.find("m:v", NS)
+            if v is None:
+                values.append(None)
+            elif cell.get("t") == "s":
+                values.append(strings[int(v.text)])
+            else:
+                values.append(float(v.text))
+        rows.append(values)
+    return rows, sheet, sst
+
+
+def test_excel_sink_round_trip(tmp_path):
+    path = tmp_path / "coins.xlsx"
+    sink = ExcelSink(path)
+    sink.append_page(3, [coin("Gamma", 3.0)])
+    sink.append_page(1, [coin("Alpha", 1.0), coin('A & B <C> "D"\x01\x1f', 1.5)])
+    assert sink.rows_written == 2           # page 3 is held back until page 2 arrives
+    sink.append_page(2, [coin("Beta", 2.0)])
+    assert sink.close() == path
+    assert sink.rows_written == 4
+
+    rows, sheet, sst = read_sheet(path)
+    data = rows[crypto_scraper.HEADER_ROW:]
+
+    # Pages land in rank order whatever order they were appended in
+    assert [r[0] for r in data] == ["Alpha", 'A & B <C> "D"', "Beta", "Gamma"]
+    assert rows[crypto_scraper.HEADER_ROW - 1] == crypto_scraper.HEADERS
+
+    # Numbers are numeric cells, text goes through the shared‑string table,
+    # None stays an empty cell
+    assert data[0] == ["Alpha", 1.0, 0.01, -0.02, None, 1e9, 2e10, "https://example.com/Alpha"]
+    cells = sheet.findall("m:sheetData/m:row/m:c", NS)
+    price = next(c for c in cells if c.get("r") == f"B{crypto_scraper.HEADER_ROW + 1}")
+    assert price.get("t") is None
+
+    # count = string cells in the sheet, uniqueCount = distinct strings
+    string_cells = [c for c in cells if c.get("t") == "s"]
+    assert int(sst.get("count")) == len(string_cells)
+    assert int(sst.get("uniqueCount")) == len(sst.findall("m:si", NS))
+    assert len({c.find("m:v", NS).text for c in string_cells}) == len(sst.findall("m:si", NS))
+
+
+def test_excel_sink_shares_repeated_text(tmp_path):
+    path = tmp_path / "coins.xlsx"
+    sink = ExcelSink(path)
+    sink.append_page(1, [coin("Same", 1.0), coin("Same", 2.0)])
+    sink.close()
+
+    _, _, sst = read_sheet(path)
+    texts = [si.find("m:t", NS).text for si in sst.findall("m:si", NS)]
+    assert texts.count("Same") == 1
+    assert int(sst.get("count")) > int(sst.get("uniqueCount"))
+
+
+def test_excel_sink_without_rows_writes_no_file(tmp_path):
+    path = tmp_path / "coins.xlsx"
+    sink = ExcelSink(path)
+    sink.append_page(1, [])
+    assert sink.close() is None
+    assert not path.exists()
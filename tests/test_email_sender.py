@@ -0,0 +1,234 @@
+"""
+Drive email_sender's SMTP sessions against a small local SMTP server that
+speaks STARTTLS or implicit TLS with a self‑signed "localhost" certificate
+(tests/localhost.pem), so hostname checking is exercised for real.
+Also covers how Excel files are found for the file menu.
+"""
+
+import os
+import smtplib
+import socket
+import ssl
+import threading
+from pathlib import Path
+
+import pytest
+
+import email_sender
+
+CERT = Path(__file__).with_name("localhost.pem")
+
+
+class LocalSMTPServer:
+    """
+    Minimal SMTP server on 127.0.0.1: EHLO, STARTTLS, AUTH, MAIL, RCPT,
+    DATA, RSET, NOOP, QUIT. `rcpt_replies` lets a test queue replies for
+    RCPT TO (e.g. a 451 greylisting answer) before the default 250.
+    """
+
+    def __init__(self, implicit_tls: bool = False):
+        self.implicit_tls = implicit_tls
+        self.tls = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.tls.load_cert_chain(CERT)
+        self.rcpt_replies: list[str] = []
+        self.logins = 0
+        self.messages: list[tuple[list[str], bytes]] = []
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._session, args=(conn,), daemon=True).start()
+
+    def _session(self, conn: socket.socket) -> None:
+        try:
+            if self.implicit_tls:
+                conn = self.tls.wrap_socket(conn, server_side=True)
+            self._talk(conn)
+        except (OSError, ssl.SSLError):
+            pass
+        finally:
+            conn.close()
+
+    def _talk(self, conn: socket.socket) -> None:
+        encrypted = self.implicit_tls
+        rfile = conn.makefile("rb")
+        rcpts = []
+
+        def reply(text: str) -> None:
+            conn.sendall(text.encode() + b"\r\n")
+
+        reply("220 localhost ESMTP test")
+        while line := rfile.readline():
+            verb = line.decode().strip().split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                lines = ["localhost", "AUTH PLAIN LOGIN"]
+                if not encrypted:
+                    lines.append("STARTTLS")
+                for extra in lines[:-1]:
+                    reply(f"250-{extra}")
+                reply(f"250 {lines[-1]}")
+            elif verb == "STARTTLS":
+                reply("220 Ready to start TLS")
+                conn = self.tls.wrap_socket(conn, server_side=True)
+                rfile = conn.makefile("rb")
+                encrypted = True
+            elif verb == "AUTH":
+                self.logins += 1
+                reply("235 Authentication successful")
+            elif verb == "MAIL":
+                rcpts = []
+                reply("250 OK")
+            elif verb == "RCPT":
+                answer = self.rcpt_replies.pop(0) if self.rcpt_replies else "250 OK"
+                if answer.startswith("250"):
+                    rcpts.append(line.decode().split(":", 1)[1].strip().strip("<>"))
+                reply(answer)
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b""
+                while (chunk := rfile.readline()) != b".\r\n":
+                    data += chunk
+                self.messages.append((rcpts, data))
+                reply("250 Queued")
+            elif verb in ("RSET", "NOOP"):
+                rcpts = []
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                return
+            else:
+                reply("502 Command not implemented")
+
+
+@pytest.fixture
+def trust_local_cert(monkeypatch):
+    """Make email_sender verify TLS against the test certificate."""
+    context = ssl.create_default_context(cafile=str(CERT))
+    monkeypatch.setattr(email_sender, "_ssl_context", lambda: context)
+
+
+def make_config(port: int, use_ssl: bool = False) -> email_sender.SmtpConfig:
+    return email_sender.SmtpConfig(
+        host="localhost", port=port, user="sender@example.com", password="secret",
+        recipient="to@example.com", log_level="INFO", use_ssl=use_ssl, workers=1,
+    )
+
+
+@pytest.fixture
+def attachment(tmp_path):
+    path = tmp_path / "report.xlsx"
+    path.write_bytes(b"PK\x03\x04 fake workbook")
+    return path
+
+
+def test_smtp_session_starttls_logs_in_and_sends(trust_local_cert, attachment):
+    server = LocalSMTPServer()
+    try:
+        config = make_config(server.port)
+        message = email_sender.build_message(attachment, "Report", "Body", config.user)
+        with email_sender.smtp_session(config) as connection:
+            email_sender.send_with_retry(connection, "a@example.com", message)
+            email_sender.send_with_retry(connection, "b@example.com", message)
+    finally:
+        server.close()
+
+    assert server.logins == 1
+    assert [rcpts for rcpts, _ in server.messages] == [["a@example.com"], ["b@example.com"]]
+    assert b"report.xlsx" in server.messages[0][1]
+
+
+def test_smtp_session_implicit_tls_skips_starttls(trust_local_cert, attachment):
+    server = LocalSMTPServer(implicit_tls=True)
+    try:
+        config = make_config(server.port, use_ssl=True)
+        message = email_sender.build_message(attachment, "Report", "Body", config.user)
+        with email_sender.smtp_session(config) as connection:
+            assert not connection.server.has_extn("starttls")
+            email_sender.send_with_retry(connection, "a@example.com", message)
+    finally:
+        server.close()
+
+    assert server.logins == 1
+    assert [rcpts for rcpts, _ in server.messages] == [["a@example.com"]]
+
+
+def test_send_with_retry_reconnects_with_a_new_connection(trust_local_cert, attachment):
+    server = LocalSMTPServer()
+    try:
+        config = make_config(server.port)
+        message = email_sender.build_message(attachment, "Report", "Body", config.user)
+        with email_sender.smtp_session(config) as connection:
+            first = connection.server
+            first.sock.shutdown(socket.SHUT_RDWR)    # simulate a dropped connection
+            email_sender.send_with_retry(connection, "a@example.com", message, backoff=0)
+            assert connection.server is not first
+    finally:
+        server.close()
+
+    assert server.logins == 2
+    assert [rcpts for rcpts, _ in server.messages] == [["a@example.com"]]
+
+
+def test_send_with_retry_retries_greylisted_recipient(trust_local_cert, attachment):
+    server = LocalSMTPServer()
+    server.rcpt_replies = ["451 4.7.1 Greylisted, please try again later"]
+    try:
+        config = make_config(server.port)
+        message = email_sender.build_message(attachment, "Report", "Body", config.user)
+        with email_sender.smtp_session(config) as connection:
+            email_sender.send_with_retry(connection, "a@example.com", message, backoff=0)
+    finally:
+        server.close()
+
+    assert [rcpts for rcpts, _ in server.messages] == [["a@example.com"]]
+
+
+def test_send_with_retry_raises_on_permanent_recipient_error(trust_local_cert, attachment):
+    server = LocalSMTPServer()
+    server.rcpt_replies = ["550 5.1.1 No such user"]
+    try:
+        config = make_config(server.port)
+        message = email_sender.build_message(attachment, "Report", "Body", config.user)
+        with email_sender.smtp_session(config) as connection:
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                email_sender.send_with_retry(connection, "a@example.com", message, backoff=0)
+    finally:
+        server.close()
+
+    assert server.messages == []
+
+
+class WindowsDirEntry:
+    """os.DirEntry as seen on Windows: stat() reports st_dev == st_ino == 0."""
+
+    def __init__(self, path: Path):
+        self.path = str(path)
+        self.name = path.name
+        self._stat = path.stat()
+
+    def stat(self):
+        st = self._stat
+        return os.stat_result((st.st_mode, 0, 0, *st[3:]))
+
+
+def test_list_available_excel_files_keeps_distinct_files_without_dirent_inodes(
+        tmp_path, monkeypatch):
+    older, newer = tmp_path / "older.xlsx", tmp_path / "newer.xlsx"
+    older.write_bytes(b"old")
+    newer.write_bytes(b"new")
+    os.utime(older, (1_000_000, 1_000_000))
+    monkeypatch.setattr(email_sender, "_scan_dir",
+                        lambda directory: [WindowsDirEntry(older), WindowsDirEntry(newer)])
+
+    files = email_sender.list_available_excel_files([str(tmp_path)])
+
+    assert [entry.name for entry in files] == ["newer.xlsx", "older.xlsx"]